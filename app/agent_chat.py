@@ -1,14 +1,63 @@
 from __future__ import annotations
 
-import json
-import os
-from typing import Any, Dict, Optional
+import asyncio
+import contextvars
+import re
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
 
-from dotenv import load_dotenv
+from app.config import env_float, env_optional, env_str
+from app.context_builder import AgentContext, build_agent_context, prepare_agent_context
+from app.llm_clients import get_async_client, get_client
+from app.llm_guard import begin_call, llm_available, record_failure, record_success
+from app.response_cache import RESPONSE_CACHE
 
-from app.context_builder import build_agent_context
+# Part of every response cache key; bump when the prompts below change.
+PROMPT_VERSION = "2"
 
-load_dotenv()
+_QUESTION_TRIM_RE = re.compile(r"[\s?!.,]+$")
+
+# Questions routed to a lookup intent with at least this confidence are
+# answered locally; the rest go to the LLM.
+INTENT_ROUTER_THRESHOLD = env_float("INTENT_ROUTER_THRESHOLD", 0.75)
+
+_INTENT_PATTERNS = [
+    (intent, re.compile(pattern), weight)
+    for intent, pattern, weight in [
+        # The housing answer reads no data (the summary has no labelled rent),
+        # so housing stays below the threshold and goes to the LLM; a match
+        # still marks e.g. "how much did I spend on rent" as mixed.
+        ("housing", r"\b(rent|mortgage|housing|landlord)\b", 0.5),
+        ("housing", r"\bloans?\b", 0.5),
+        ("anomalies", r"\b(suspicious|anomal\w*|unusual|fraud\w*)\b", 0.95),
+        ("anomalies", r"\b(weird|strange|odd|unexpected|unknown) (charges?|transactions?|payments?|spend\w*)\b", 0.9),
+        ("savings", r"\bhow (can|do|could) i (save|cut|reduce|spend less)\b", 0.95),
+        ("savings", r"\b(save|saving|savings|cut|cutting|reduce|trim|spend less)\b", 0.8),
+        ("top_spending", r"\bwhere (does|do|did|is) (all )?my (money|cash|salary|spending) go", 0.98),
+        ("top_spending", r"\b(most|majority) of my (money|spending)\b", 0.95),
+        ("top_spending", r"\b(biggest|top|largest|main|highest) (expenses?|spending|categor\w+|merchants?)\b", 0.9),
+        ("top_spending", r"\bwhat do i spend (the )?most on\b", 0.95),
+        ("top_spending", r"\bwhere\b.*\bgo(es|ing)?\b", 0.8),
+        ("overview", r"\bhow much (did|have|do) i (spend|spent)\b", 0.9),
+        ("overview", r"\b(total|overall) (spend\w*|expenses?)\b", 0.9),
+        ("overview", r"\b(spending )?(overview|snapshot|summary)\b", 0.85),
+        ("overview", r"\bhow many (subscriptions|recurring bills|bills)\b", 0.85),
+    ]
+]
+
+# Questions asking for reasoning, judgement or plans are left to the LLM.
+_OPEN_ENDED_RE = re.compile(
+    r"\b(why|should|would|what if|explain|compare|versus|vs|worth|better|instead|plan|strategy|"
+    r"afford|recommend|advice|advise|predict|forecast|next (month|year)|invest\w*)\b"
+)
+
+_ROUTE: contextvars.ContextVar[Optional[Route]] = contextvars.ContextVar("agent_route", default=None)
+_TRUNCATED: contextvars.ContextVar[bool] = contextvars.ContextVar("agent_stream_truncated", default=False)
+
+# Joins a streamed reply that broke off to the fallback answer sent after it.
+TRUNCATED_NOTICE = "\n\n(The answer was cut off. Based on your summary:)\n"
 
 
 def _to_float(value: Any) -> float:
@@ -18,9 +67,22 @@ def _to_float(value: Any) -> float:
         return 0.0
 
 
-def _fallback_answer(summary: Dict, question: str, goal_aed: Optional[int]) -> str:
-    context = build_agent_context(summary)
-    q = (question or "").strip().lower()
+def _fallback_intent(q: str) -> str:
+    if any(term in q for term in ["rent", "mortgage", "loan"]):
+        return "housing"
+    if "suspicious" in q or "anomal" in q:
+        return "anomalies"
+    if "save" in q or "cut" in q or "reduce" in q:
+        return "savings"
+    if "most" in q and "money" in q or "where" in q and "go" in q:
+        return "top_spending"
+    return "overview"
+
+
+def _local_answer(context: Dict[str, Any], intent: str, goal_aed: Optional[int]) -> str:
+    """
+    Templated answer for one of the data-lookup intents, from the agent context alone.
+    """
     goal = goal_aed if goal_aed is not None else 300
 
     total_spent = _to_float(context.get("total_spent_aed"))
@@ -30,7 +92,7 @@ def _fallback_answer(summary: Dict, question: str, goal_aed: Optional[int]) -> s
 
     lines = ["Got it — I checked your latest spending snapshot."]
 
-    if any(term in q for term in ["rent", "mortgage", "loan"]):
+    if intent == "housing":
         lines.append("I can’t see a clearly labeled rent or mortgage payment yet.")
         lines.append("• Share which merchant or category is your housing cost")
         lines.append("• I can estimate a monthly housing target once that’s identified")
@@ -38,7 +100,7 @@ def _fallback_answer(summary: Dict, question: str, goal_aed: Optional[int]) -> s
         lines.append("Which transaction should I treat as your rent or mortgage?")
         return "\n".join(lines)
 
-    if "suspicious" in q or "anomal" in q:
+    if intent == "anomalies":
         if anomalies:
             top = anomalies[0]
             lines.append(
@@ -46,12 +108,12 @@ def _fallback_answer(summary: Dict, question: str, goal_aed: Optional[int]) -> s
             )
         else:
             lines.append("Good news: there are no unusual charges flagged right now.")
-    elif "save" in q or "cut" in q or "reduce" in q:
+    elif intent == "savings":
         biggest_cat = top_categories[0] if top_categories else {"name": "other", "amount_aed": 0.0}
         lines.append(
             f"Your fastest savings win is trimming {biggest_cat['name']}, where you spent {biggest_cat['amount_aed']:.2f} AED."
         )
-    elif "most" in q and "money" in q or "where" in q and "go" in q:
+    elif intent == "top_spending":
         biggest_cat = top_categories[0] if top_categories else {"name": "other", "amount_aed": 0.0}
         biggest_merch = top_merchants[0] if top_merchants else {"name": "UNKNOWN", "amount_aed": 0.0}
         lines.append(
@@ -69,22 +131,109 @@ def _fallback_answer(summary: Dict, question: str, goal_aed: Optional[int]) -> s
     return "\n".join(lines)
 
 
-def answer_user_question(
-    summary: dict,
+def _fallback_answer(
+    summary: Dict,
     question: str,
-    goal_aed: int | None = 300,
+    goal_aed: Optional[int],
+    agent_context: Optional[AgentContext] = None,
 ) -> str:
+    context = agent_context.data if agent_context is not None else build_agent_context(summary)
+    return _local_answer(context, _fallback_intent((question or "").strip().lower()), goal_aed)
+
+
+@dataclass(frozen=True)
+class Route:
     """
-    Answers a free-form user question grounded strictly in computed summary data.
+    Router decision for a question: a data-lookup intent answered by
+    _local_answer, or "open" for the LLM.
+    """
+
+    intent: str
+    confidence: float
+
+    @property
+    def local(self) -> bool:
+        return self.intent != "open" and self.confidence >= INTENT_ROUTER_THRESHOLD
+
+
+def route_question(question: str) -> Route:
+    """
+    Scores the question against the lookup intents. The strongest pattern of
+    each intent counts; the score is discounted when several intents match,
+    when the question asks for reasoning or a decision, and for long questions.
+    """
+    q = _normalize_question(question)
+    scores: Dict[str, float] = {}
+    for intent, pattern, weight in _INTENT_PATTERNS:
+        if weight > scores.get(intent, 0.0) and pattern.search(q):
+            scores[intent] = weight
+    if not scores:
+        return Route("open", 0.0)
+
+    intent, confidence = max(scores.items(), key=lambda item: item[1])
+    if len(scores) > 1:
+        confidence *= 0.5
+    if _OPEN_ENDED_RE.search(q):
+        confidence *= 0.6
+    if len(q.split()) > 12:
+        confidence *= 0.7
+    return Route(intent, round(confidence, 3))
+
+
+def last_route() -> Optional[Route]:
+    """
+    Route taken by the last answer in the current context.
+    """
+    return _ROUTE.get()
+
+
+def stream_truncated() -> bool:
     """
-    api_key = os.getenv("LLM_API_KEY", "").strip()
-    model = os.getenv("LLM_MODEL", "gpt-4o-mini").strip()
+    True when the last streamed answer in the current context broke off
+    after its first delta.
+    """
+    return _TRUNCATED.get()
+
+
+def _answer_locally(
+    summary: dict,
+    question: str,
+    goal_aed: int | None,
+    agent_context: Optional[AgentContext],
+) -> Optional[str]:
+    route = route_question(question)
+    _ROUTE.set(route)
+    if not route.local:
+        return None
+    context = agent_context.data if agent_context is not None else build_agent_context(summary or {})
+    return _local_answer(context, route.intent, goal_aed)
+
+
+def _llm_settings() -> Tuple[str, str, Optional[str]]:
+    return (
+        env_str("LLM_API_KEY"),
+        env_str("LLM_MODEL", "gpt-4o-mini"),
+        env_optional("LLM_BASE_URL"),
+    )
+
+
+def _normalize_question(question: str) -> str:
+    return _QUESTION_TRIM_RE.sub("", " ".join((question or "").lower().split()))
 
-    context = build_agent_context(summary or {})
 
-    if not api_key:
-        return _fallback_answer(summary or {}, question, goal_aed)
+def _response_key(
+    agent_context: AgentContext,
+    question: str,
+    goal_aed: int | None,
+    model: str,
+) -> Tuple[str, str, Optional[int], str, str]:
+    """
+    Response cache key: (summary fingerprint, normalized question, goal, model, prompt version).
+    """
+    return (agent_context.fingerprint, _normalize_question(question), goal_aed, model, PROMPT_VERSION)
 
+
+def _build_prompts(agent_context: AgentContext, question: str, goal_aed: int | None) -> Tuple[str, str]:
     system_prompt = (
         "You are a friendly, confident financial assistant for a live demo.\n"
         "Hard rules:\n"
@@ -104,8 +253,8 @@ def answer_user_question(
 
     goal_text = goal_aed if goal_aed is not None else 300
     user_prompt = (
-        "DATA CONTEXT (authoritative JSON):\n"
-        f"{json.dumps(context, ensure_ascii=False)}\n\n"
+        "DATA CONTEXT (authoritative; each list names its columns, then one '|'-separated row per item):\n"
+        f"{agent_context.text}\n\n"
         "USER QUESTION:\n"
         f"{question}\n\n"
         "USER GOAL:\n"
@@ -117,22 +266,217 @@ def answer_user_question(
         "- Follow the 4-part response format exactly\n"
         "- End with a follow-up question"
     )
+    return system_prompt, user_prompt
+
+
+def _prepare(
+    summary: dict,
+    question: str,
+    goal_aed: int | None,
+    agent_context: Optional[AgentContext],
+) -> Tuple[AgentContext, Optional[tuple]]:
+    """
+    Prompt context (reused when the caller has it precomputed) and response
+    cache key (None without an API key).
+    """
+    api_key, model, _ = _llm_settings()
+    agent_context = agent_context or prepare_agent_context(summary)
+    key = _response_key(agent_context, question, goal_aed, model) if api_key else None
+    return agent_context, key
+
+
+def _llm_answer(agent_context: AgentContext, question: str, goal_aed: int | None) -> Optional[str]:
+    api_key, model, base_url = _llm_settings()
+    if not api_key or not llm_available():
+        return None
+
+    system_prompt, user_prompt = _build_prompts(agent_context, question, goal_aed)
 
     try:
-        from openai import OpenAI
-
-        client = OpenAI(api_key=api_key)
-        resp = client.responses.create(
-            model=model,
-            instructions=system_prompt,
-            input=user_prompt,
-            temperature=0,
-            max_output_tokens=300,
-        )
+        options, capped = begin_call()
+        client = get_client("openai", api_key, model, base_url).with_options(**options)
+        try:
+            resp = client.responses.create(
+                model=model,
+                instructions=system_prompt,
+                input=user_prompt,
+                temperature=0,
+                max_output_tokens=300,
+            )
+        except Exception as exc:
+            record_failure(exc, capped)
+            raise
+        record_success()
+        return (resp.output_text or "").strip() or None
+    except Exception:
+        return None
+
+
+def answer_user_question(
+    summary: dict,
+    question: str,
+    goal_aed: int | None = 300,
+    agent_context: Optional[AgentContext] = None,
+) -> str:
+    """
+    Answers a free-form user question grounded strictly in computed summary data.
+    Data-lookup questions the router is confident about (route_question) are
+    answered locally; repeated questions are served from the response cache
+    (app/response_cache.py).
+    Falls back to _fallback_answer when the LLM is unavailable, fails, or the
+    circuit breaker / request budget (app/llm_guard.py) rules the call out.
+    """
+    local = _answer_locally(summary, question, goal_aed, agent_context)
+    if local is not None:
+        return local
+
+    agent_context, key = _prepare(summary, question, goal_aed, agent_context)
+    text = RESPONSE_CACHE.get_or_compute(key, lambda: _llm_answer(agent_context, question, goal_aed))
+    return text or _fallback_answer(summary or {}, question, goal_aed, agent_context)
+
+
+async def _llm_answer_async(agent_context: AgentContext, question: str, goal_aed: int | None) -> Optional[str]:
+    api_key, model, base_url = _llm_settings()
+    if not api_key or not llm_available():
+        return None
 
-        text = (resp.output_text or "").strip()
-        if not text:
-            return _fallback_answer(summary or {}, question, goal_aed)
-        return text
+    system_prompt, user_prompt = _build_prompts(agent_context, question, goal_aed)
+
+    try:
+        options, capped = begin_call()
+        client = get_async_client("openai", api_key, model, base_url).with_options(**options)
+        try:
+            resp = await asyncio.wait_for(
+                client.responses.create(
+                    model=model,
+                    instructions=system_prompt,
+                    input=user_prompt,
+                    temperature=0,
+                    max_output_tokens=300,
+                ),
+                timeout=options["timeout"],
+            )
+        except Exception as exc:
+            record_failure(exc, capped)
+            raise
+        record_success()
+        return (resp.output_text or "").strip() or None
     except Exception:
-        return _fallback_answer(summary or {}, question, goal_aed)
+        return None
+
+
+async def answer_user_question_async(
+    summary: dict,
+    question: str,
+    goal_aed: int | None = 300,
+    agent_context: Optional[AgentContext] = None,
+) -> str:
+    """
+    Same as answer_user_question, on the pooled async client: the event loop
+    is free while the completion is generated.
+    """
+    local = _answer_locally(summary, question, goal_aed, agent_context)
+    if local is not None:
+        return local
+
+    agent_context, key = _prepare(summary, question, goal_aed, agent_context)
+    text = await RESPONSE_CACHE.get_or_compute_async(key, lambda: _llm_answer_async(agent_context, question, goal_aed))
+    return text or _fallback_answer(summary or {}, question, goal_aed, agent_context)
+
+
+async def _llm_stream(agent_context: AgentContext, question: str, goal_aed: int | None) -> AsyncIterator[str]:
+    """
+    Text deltas of one streamed completion. Raises on failure or timeout.
+    """
+    api_key, model, base_url = _llm_settings()
+    system_prompt, user_prompt = _build_prompts(agent_context, question, goal_aed)
+
+    stream = None
+    options, capped = begin_call()
+    deadline = time.monotonic() + options["timeout"]
+    client = get_async_client("openai", api_key, model, base_url).with_options(**options)
+    try:
+        stream = await asyncio.wait_for(
+            client.responses.create(
+                model=model,
+                instructions=system_prompt,
+                input=user_prompt,
+                temperature=0,
+                max_output_tokens=300,
+                stream=True,
+            ),
+            timeout=options["timeout"],
+        )
+        events = stream.__aiter__()
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            try:
+                event = await asyncio.wait_for(events.__anext__(), timeout=remaining)
+            except StopAsyncIteration:
+                break
+            if getattr(event, "type", None) == "response.output_text.delta" and event.delta:
+                yield event.delta
+    except Exception as exc:
+        record_failure(exc, capped)
+        raise
+    finally:
+        if stream is not None:
+            await stream.close()
+    record_success()
+
+
+async def stream_user_question_async(
+    summary: dict,
+    question: str,
+    goal_aed: int | None = 300,
+    agent_context: Optional[AgentContext] = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming answer_user_question_async: yields text deltas as the model
+    produces them. A cached or coalesced answer, or _fallback_answer when the
+    LLM is unavailable or fails before the first delta, is yielded as a
+    single chunk instead. When the stream fails after that, TRUNCATED_NOTICE
+    and _fallback_answer follow what was sent and stream_truncated() is set.
+    """
+    _TRUNCATED.set(False)
+    local = _answer_locally(summary, question, goal_aed, agent_context)
+    if local is not None:
+        yield local
+        return
+
+    agent_context, key = _prepare(summary, question, goal_aed, agent_context)
+    cached = RESPONSE_CACHE.lookup(key)
+    if cached is not None:
+        yield cached
+        return
+
+    future = None
+    if key is not None and RESPONSE_CACHE.enabled:
+        future, leader = RESPONSE_CACHE.begin_async(key)
+        if not leader:
+            # An identical question is already streaming; reuse its full answer.
+            yield await RESPONSE_CACHE.follow_async(future) or _fallback_answer(summary or {}, question, goal_aed, agent_context)
+            return
+
+    api_key, _, _ = _llm_settings()
+    parts = []
+    text = None
+    try:
+        if api_key and llm_available():
+            try:
+                async with aclosing(_llm_stream(agent_context, question, goal_aed)) as deltas:
+                    async for delta in deltas:
+                        parts.append(delta)
+                        yield delta
+                text = "".join(parts).strip() or None
+            except Exception:
+                if parts:
+                    _TRUNCATED.set(True)
+    finally:
+        if future is not None:
+            RESPONSE_CACHE.finish_async(key, future, text)
+
+    if not parts:
+        yield _fallback_answer(summary or {}, question, goal_aed, agent_context)
+    elif _TRUNCATED.get():
+        yield TRUNCATED_NOTICE + _fallback_answer(summary or {}, question, goal_aed, agent_context)
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import heapq
+from array import array
 from collections import defaultdict
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from statistics import median
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from app.metrics import span
+from app.models import NO_CATEGORY, TransactionTable
 
 SUBSCRIPTION_CATEGORIES = {"subscriptions", "digital_services"}
 RECURRING_BILL_CATEGORIES = {"utilities", "telecom"}
@@ -42,13 +47,17 @@ def total_spent(txs: List[Dict]) -> float:
     return round(sum(-_amount(tx) for tx in expenses), 2)
 
 
+def _rank_sums(sums: Dict[str, float], n: int) -> List[Tuple[str, float]]:
+    ranked = sorted(sums.items(), key=lambda x: x[1], reverse=True)[:n]
+    return [(name, round(amount, 2)) for name, amount in ranked]
+
+
 def top_categories(txs: List[Dict], n: int = 5) -> List[Tuple[str, float]]:
     sums = defaultdict(float)
     for tx in _expense_transactions(txs):
         sums[_category(tx)] += -_amount(tx)
 
-    ranked = sorted(sums.items(), key=lambda x: x[1], reverse=True)[:n]
-    return [(cat, round(amount, 2)) for cat, amount in ranked]
+    return _rank_sums(sums, n)
 
 
 def top_merchants(txs: List[Dict], n: int = 5) -> List[Tuple[str, float]]:
@@ -56,8 +65,7 @@ def top_merchants(txs: List[Dict], n: int = 5) -> List[Tuple[str, float]]:
     for tx in _expense_transactions(txs):
         sums[_merchant(tx)] += -_amount(tx)
 
-    ranked = sorted(sums.items(), key=lambda x: x[1], reverse=True)[:n]
-    return [(merchant, round(amount, 2)) for merchant, amount in ranked]
+    return _rank_sums(sums, n)
 
 
 @dataclass
@@ -89,6 +97,23 @@ def _detect_recurring_by_categories(
 
         by_merchant[_merchant(tx)].append((dt, -_amount(tx)))
 
+    return _recurring_hits(
+        by_merchant,
+        min_occurrences=min_occurrences,
+        amount_tolerance_pct=amount_tolerance_pct,
+        min_days_between=min_days_between,
+        max_days_between=max_days_between,
+    )
+
+
+def _recurring_hits(
+    by_merchant: Dict[str, List[Tuple[datetime, float]]],
+    *,
+    min_occurrences: int = 2,
+    amount_tolerance_pct: float = 0.12,
+    min_days_between: int = 20,
+    max_days_between: int = 40,
+) -> List[RecurringHit]:
     hits: List[RecurringHit] = []
     for merchant, items in by_merchant.items():
         if len(items) < min_occurrences:
@@ -177,15 +202,13 @@ def detect_anomalies(
 
         if spend > multiplier * cat_median:
             anomalies.append(
-                AnomalyHit(
+                _anomaly_hit(
                     date=(tx.get("date") or ""),
                     merchant=_merchant(tx),
                     category=cat,
-                    amount=round(spend, 2),
-                    reason=(
-                        f"High spend vs your typical {cat} "
-                        f"(>{multiplier:.1f}× median {cat_median:.2f})"
-                    ),
+                    spend=spend,
+                    multiplier=multiplier,
+                    cat_median=cat_median,
                 )
             )
 
@@ -193,17 +216,290 @@ def detect_anomalies(
     return anomalies[:top_n]
 
 
-def build_summary(txs: List[Dict]) -> Dict:
-    subscriptions = detect_subscriptions(txs)
-    recurring_bills = detect_recurring_bills(txs)
-    anomalies = detect_anomalies(txs)
+def _anomaly_hit(
+    *,
+    date: str,
+    merchant: str,
+    category: str,
+    spend: float,
+    multiplier: float,
+    cat_median: float,
+) -> AnomalyHit:
+    return AnomalyHit(
+        date=date,
+        merchant=merchant,
+        category=category,
+        amount=round(spend, 2),
+        reason=(
+            f"High spend vs your typical {category} "
+            f"(>{multiplier:.1f}× median {cat_median:.2f})"
+        ),
+    )
+
+
+class SummaryState:
+    """
+    Incremental, mergeable aggregation state behind build_summary.
+
+    Every transaction is visited once; totals, per-category and per-merchant
+    sums, recurring candidates and anomaly baselines are all built in that
+    single walk. Only aggregates are kept: per-category spend amounts
+    (8 bytes each, needed for exact medians), per-merchant (date, amount)
+    pairs for the subscription/bill categories and the top anomaly
+    candidates per category. Output matches the per-metric functions above.
+
+    add(txs) folds in new rows in O(new rows), so a statement that grows a
+    few rows a day does not need a full rebuild. merge(other) combines
+    states built on separate shards; `other` is treated as coming after
+    `self`, which keeps ranking ties identical to a single pass over the
+    concatenated rows (float sums may differ in the last ulp).
+    """
+
+    def __init__(
+        self,
+        *,
+        anomaly_multiplier: float = 2.0,
+        anomaly_min_amount: float = 150.0,
+        anomaly_top_n: int = 5,
+    ) -> None:
+        self.anomaly_multiplier = anomaly_multiplier
+        self.anomaly_min_amount = anomaly_min_amount
+        self.anomaly_top_n = anomaly_top_n
+
+        self.tx_count = 0
+        self.expense_count = 0
+        self.total_spent: float = 0  # int 0 when empty, like sum([])
+        self.category_sums: Dict[str, float] = {}
+        self.merchant_sums: Dict[str, float] = {}
+        self.category_amounts: Dict[str, array] = {}
+        self.subscriptions: Dict[str, List[Tuple[datetime, float]]] = defaultdict(list)
+        self.recurring_bills: Dict[str, List[Tuple[datetime, float]]] = defaultdict(list)
+        # category -> min-heap of (rounded spend, -expense index, spend, date, merchant)
+        self.anomaly_candidates: Dict[str, List[Tuple[float, int, float, str, str]]] = {}
+
+        # raw value -> normalized value; statements repeat the same few strings
+        self._category_names: Dict[Optional[str], str] = {}
+        self._merchant_names: Dict[Optional[str], str] = {}
+        self._dates: Dict[str, Optional[datetime]] = {}
+        # category -> length of the sorted prefix of category_amounts[cat]
+        self._sorted_len: Dict[str, int] = {}
+
+    def add(self, txs: Union[Iterable[Dict], TransactionTable]) -> "SummaryState":
+        """
+        Folds new transactions (dicts, any iterable, or a TransactionTable)
+        into the state. Returns self.
+        """
+        if isinstance(txs, TransactionTable):
+            self._add_table(txs)
+        else:
+            self._add_rows(txs)
+        return self
+
+    def merge(self, other: "SummaryState") -> "SummaryState":
+        """
+        Folds another state (built from rows that follow this state's rows)
+        into this one. Returns self.
+        """
+        if (
+            other.anomaly_multiplier != self.anomaly_multiplier
+            or other.anomaly_min_amount != self.anomaly_min_amount
+            or other.anomaly_top_n != self.anomaly_top_n
+        ):
+            raise ValueError("Cannot merge SummaryState objects with different anomaly settings")
+
+        offset = self.expense_count
+        self.tx_count += other.tx_count
+        self.expense_count += other.expense_count
+        self.total_spent += other.total_spent
+
+        for cat, amount in other.category_sums.items():
+            self.category_sums[cat] = self.category_sums.get(cat, 0.0) + amount
+        for merchant, amount in other.merchant_sums.items():
+            self.merchant_sums[merchant] = self.merchant_sums.get(merchant, 0.0) + amount
+
+        for cat, amounts in other.category_amounts.items():
+            if cat in self.category_amounts:
+                self.category_amounts[cat].extend(amounts)
+            else:
+                self.category_amounts[cat] = array("d", amounts)
+
+        for mine, theirs in (
+            (self.subscriptions, other.subscriptions),
+            (self.recurring_bills, other.recurring_bills),
+        ):
+            for merchant, items in theirs.items():
+                mine[merchant].extend(items)
+
+        for cat, entries in other.anomaly_candidates.items():
+            heap = self.anomaly_candidates.setdefault(cat, [])
+            for rounded, neg_index, spend, date, merchant in entries:
+                self._push_anomaly_candidate(
+                    heap, (rounded, neg_index - offset, spend, date, merchant)
+                )
+
+        return self
+
+    def _add_rows(self, txs: Iterable[Dict]) -> None:
+        category_names = self._category_names
+        merchant_names = self._merchant_names
+        parsed_dates = self._dates
+        min_amount = self.anomaly_min_amount
+        tx_count = self.tx_count
+
+        for tx in txs:
+            tx_count += 1
+
+            amount = _amount(tx)
+            if amount >= 0:
+                continue
+
+            raw_cat = tx.get("category")
+            cat = category_names.get(raw_cat)
+            if cat is None:
+                cat = category_names[raw_cat] = _category(tx)
+            if cat == "income":
+                continue
+
+            raw_merchant = tx.get("merchant")
+            merchant = merchant_names.get(raw_merchant)
+            if merchant is None:
+                merchant = merchant_names[raw_merchant] = _merchant(tx)
+
+            spend = self._add_expense(cat, merchant, -amount)
+
+            if cat in SUBSCRIPTION_CATEGORIES or cat in RECURRING_BILL_CATEGORIES:
+                raw_date = (tx.get("date") or "").strip()
+                if raw_date in parsed_dates:
+                    dt = parsed_dates[raw_date]
+                else:
+                    dt = parsed_dates[raw_date] = _parse_iso_date(raw_date)
+                if dt:
+                    self._add_recurring(cat, merchant, dt, spend)
+
+            if spend >= min_amount:
+                self._add_anomaly_candidate(cat, merchant, spend, tx.get("date") or "")
+
+        self.tx_count = tx_count
+
+    def _add_table(self, table: TransactionTable) -> None:
+        """
+        Columnar fast path: category/merchant normalization and date parsing
+        run once per distinct code instead of once per row.
+        """
+        self.tx_count += len(table)
+
+        cat_names = [(c or "other").strip().lower() for c in table.categories]
+        merchant_names = [(m or "UNKNOWN").strip() or "UNKNOWN" for m in table.merchants]
+        recurring_codes = {
+            code for code, cat in enumerate(cat_names)
+            if cat in SUBSCRIPTION_CATEGORIES or cat in RECURRING_BILL_CATEGORIES
+        }
+        min_amount = self.anomaly_min_amount
+
+        for i, (amount, cat_code, merchant_code) in enumerate(
+            zip(table.amounts, table.category_codes, table.merchant_codes)
+        ):
+            if amount >= 0:
+                continue
+            cat = "other" if cat_code == NO_CATEGORY else cat_names[cat_code]
+            if cat == "income":
+                continue
+
+            merchant = merchant_names[merchant_code]
+            spend = self._add_expense(cat, merchant, -amount)
+
+            if cat_code in recurring_codes:
+                ordinal = table.dates[i]
+                if ordinal:
+                    dt = datetime.fromordinal(ordinal)
+                else:
+                    dt = _parse_iso_date(table.date_str(i).strip())
+                if dt:
+                    self._add_recurring(cat, merchant, dt, spend)
+
+            if spend >= min_amount:
+                self._add_anomaly_candidate(cat, merchant, spend, table.date_str(i))
+
+    def _add_expense(self, cat: str, merchant: str, spend: float) -> float:
+        self.expense_count += 1
+        self.total_spent += spend
+        self.category_sums[cat] = self.category_sums.get(cat, 0.0) + spend
+        self.merchant_sums[merchant] = self.merchant_sums.get(merchant, 0.0) + spend
+
+        amounts = self.category_amounts.get(cat)
+        if amounts is None:
+            amounts = self.category_amounts[cat] = array("d")
+        amounts.append(spend)
+        return spend
+
+    def _add_recurring(self, cat: str, merchant: str, dt: datetime, spend: float) -> None:
+        group = self.subscriptions if cat in SUBSCRIPTION_CATEGORIES else self.recurring_bills
+        group[merchant].append((dt, spend))
+
+    def _add_anomaly_candidate(self, cat: str, merchant: str, spend: float, date: str) -> None:
+        # expense_count was already bumped for this row.
+        entry = (round(spend, 2), 1 - self.expense_count, spend, date, merchant)
+        self._push_anomaly_candidate(self.anomaly_candidates.setdefault(cat, []), entry)
+
+    def _push_anomaly_candidate(self, heap: List, entry: Tuple[float, int, float, str, str]) -> None:
+        if len(heap) < self.anomaly_top_n:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def _category_median(self, cat: str) -> float:
+        # Keep amounts sorted between calls: re-sorting a sorted prefix plus a
+        # short appended tail is close to linear, so repeated summaries after
+        # small add() calls stay cheap.
+        amounts = self.category_amounts[cat]
+        if self._sorted_len.get(cat) != len(amounts):
+            amounts[:] = array("d", sorted(amounts))
+            self._sorted_len[cat] = len(amounts)
+        # statistics.median would sort the (already sorted) array again.
+        mid = len(amounts) // 2
+        return amounts[mid] if len(amounts) % 2 else (amounts[mid - 1] + amounts[mid]) / 2
+
+    def _anomalies(self) -> List[AnomalyHit]:
+        ranked = []
+        for cat, heap in self.anomaly_candidates.items():
+            if len(self.category_amounts[cat]) < 3:
+                continue
+            cat_median = self._category_median(cat)
+            for rounded, neg_index, spend, date, merchant in heap:
+                if spend > self.anomaly_multiplier * cat_median:
+                    ranked.append((-rounded, -neg_index, date, merchant, cat, spend, cat_median))
+
+        ranked.sort(key=lambda x: (x[0], x[1]))
+        return [
+            _anomaly_hit(
+                date=date,
+                merchant=merchant,
+                category=cat,
+                spend=spend,
+                multiplier=self.anomaly_multiplier,
+                cat_median=cat_median,
+            )
+            for _, _, date, merchant, cat, spend, cat_median in ranked[: self.anomaly_top_n]
+        ]
 
-    return {
-        "tx_count": len(txs),
-        "total_spent_aed": total_spent(txs),
-        "top_categories_aed": top_categories(txs, n=6),
-        "top_merchants_aed": top_merchants(txs, n=6),
-        "subscriptions": [asdict(hit) for hit in subscriptions],
-        "recurring_bills": [asdict(hit) for hit in recurring_bills],
-        "anomalies": [asdict(hit) for hit in anomalies],
-    }
+    def summary(self) -> Dict:
+        return {
+            "tx_count": self.tx_count,
+            "total_spent_aed": round(self.total_spent, 2),
+            "top_categories_aed": _rank_sums(self.category_sums, 6),
+            "top_merchants_aed": _rank_sums(self.merchant_sums, 6),
+            "subscriptions": [asdict(hit) for hit in _recurring_hits(self.subscriptions)],
+            "recurring_bills": [asdict(hit) for hit in _recurring_hits(self.recurring_bills)],
+            "anomalies": [asdict(hit) for hit in self._anomalies()],
+        }
+
+
+def build_summary(txs: Union[Iterable[Dict], TransactionTable]) -> Dict:
+    """
+    Builds the spending summary in a single pass over the transactions.
+    Accepts a list, any iterable (e.g. a generator from
+    iter_transactions_as_dicts, consumed with bounded memory) or a
+    TransactionTable (aggregated column-wise).
+    """
+    with span("build_summary"):
+        return SummaryState().add(txs).summary()
@@ -1,9 +1,203 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+from app.cache import LRUCache
 from app.rules import categorize_by_rules, CATEGORIES
-from app.llm import classify_unknown_transaction_llm
+from app.llm import LLM_BATCH_SIZE
+from app.llm_cache import normalize_signature
+from app.local_classifier import classify_locally
+from app.metrics import request_metrics, span
+
+# Streaming mode never holds more than this many rows while it waits for a
+# batch of rule misses to fill up.
+MAX_BUFFERED_ROWS = 1000
+# Distinct signatures whose LLM answer is remembered for the rest of a stream.
+MAX_KNOWN_SIGNATURES = 10000
+
+Signature = Tuple[str, str]
+
+
+def new_stats() -> Dict[str, int]:
+    return {
+        "total": 0,
+        "by_rules": 0,
+        "by_local": 0,
+        "by_llm": 0,
+        "other": 0,
+        # distinct merchant/description signatures sent to the LLM classifier
+        # (answers from the LLM cache included), the provider requests made
+        # for them (batched, any outcome), and rule misses that reused the
+        # answer for an identical signature
+        "llm_lookups": 0,
+        "llm_calls": 0,
+        "llm_deduped": 0,
+    }
+
+
+def _categorize_by_rules(tx: Dict, stats: Dict[str, int]) -> Optional[str]:
+    stats["total"] += 1
+
+    merchant = (tx.get("merchant") or "").strip()
+    description = (tx.get("description") or "").strip()
+
+    cat = categorize_by_rules(merchant, description)
+    if cat is not None:
+        stats["by_rules"] += 1
+    return cat
+
+
+def _categorize_offline(tx: Dict, stats: Dict[str, int]) -> Optional[str]:
+    """
+    Rules first, then the local classifier (None unless it is confident).
+    """
+    cat = _categorize_by_rules(tx, stats)
+    if cat is None:
+        cat = classify_locally(tx.get("merchant") or "", tx.get("description") or "")
+        if cat is not None:
+            stats["by_local"] += 1
+    return cat
+
+
+def _assign(tx: Dict, cat: Optional[str], stats: Dict[str, int]) -> None:
+    if cat not in CATEGORIES:
+        cat = "other"
+
+    tx["category"] = cat
+
+    if cat == "other":
+        stats["other"] += 1
+
+
+def _llm_items(misses: List[Dict]) -> List[Dict]:
+    return [
+        {
+            "merchant": (tx.get("merchant") or "").strip(),
+            "description": (tx.get("description") or "").strip(),
+            "amount": tx.get("amount", None),
+            "currency": (tx.get("currency") or "AED").strip().upper(),
+        }
+        for tx in misses
+    ]
+
+
+def _signature(tx: Dict) -> Signature:
+    # Same normalisation as the LLM cache key, so one cached answer covers a group.
+    return normalize_signature(tx.get("merchant") or "", tx.get("description") or "")
+
+
+def _group_misses(misses: List[Dict], known: LRUCache) -> Tuple[Dict[Signature, List[Dict]], List[Signature]]:
+    """
+    Groups rule misses by signature; returns (groups, signatures not in `known`).
+    """
+    groups: Dict[Signature, List[Dict]] = {}
+    for tx in misses:
+        groups.setdefault(_signature(tx), []).append(tx)
+    return groups, [sig for sig in groups if sig not in known]
+
+
+def _assign_llm_results(
+    groups: Dict[Signature, List[Dict]],
+    pending: List[Signature],
+    categories: List[str],
+    known: LRUCache,
+    stats: Dict[str, int],
+) -> None:
+    answers = dict(zip(pending, categories))
+
+    misses = sum(len(rows) for rows in groups.values())
+    stats["by_llm"] += misses
+    stats["llm_lookups"] += len(pending)
+    stats["llm_deduped"] += misses - len(pending)
+
+    for sig, rows in groups.items():
+        cat = answers[sig] if sig in answers else known.get(sig)
+        for tx in rows:
+            _assign(tx, cat, stats)
+
+    for sig, cat in answers.items():
+        known.put(sig, cat)
+
+
+def _classify_misses(misses: List[Dict], stats: Dict[str, int], known: Optional[LRUCache] = None) -> None:
+    """
+    Sends one representative per distinct signature among the rule misses to
+    the batched (and, if configured, concurrent) LLM classifier and fans the
+    answers out to every matching row. `known` carries answers between calls.
+    """
+    if not misses:
+        return
+
+    # Imported on first use: scripts that never reach the LLM skip asyncio.
+    from app.llm_async import classify_unknown_transactions
+
+    known = LRUCache(MAX_KNOWN_SIGNATURES) if known is None else known
+    with span("categorize_llm"):
+        groups, pending = _group_misses(misses, known)
+        with request_metrics() as collected:
+            categories = classify_unknown_transactions(_llm_items([groups[sig][0] for sig in pending])) if pending else []
+        stats["llm_calls"] += int(collected.total("llm_calls"))
+        _assign_llm_results(groups, pending, categories, known, stats)
+
+
+def iter_categorized_transactions(
+    txs: Iterable[Dict],
+    *,
+    use_llm: bool = True,
+    stats: Optional[Dict[str, int]] = None,
+    batch_size: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    Streaming version of categorize_transactions.
+    Yields transactions in input order as soon as they have a category; pass a
+    dict from new_stats() as `stats` to collect coverage counters while
+    consuming. With use_llm, rows are held back until batch_size rule misses
+    (or MAX_BUFFERED_ROWS rows) have accumulated, so unknowns go to the LLM in
+    batches while memory stays bounded.
+    """
+    if stats is None:
+        stats = new_stats()
+    batch_size = max(1, batch_size or LLM_BATCH_SIZE)
+
+    buffered: List[Dict] = []
+    misses: List[Dict] = []
+    known = LRUCache(MAX_KNOWN_SIGNATURES)
+
+    for tx in txs:
+        cat = _categorize_offline(tx, stats)
+
+        if cat is not None or not use_llm:
+            _assign(tx, cat, stats)
+            if not buffered:
+                yield tx
+                continue
+        else:
+            misses.append(tx)
+
+        buffered.append(tx)
+        if len(misses) >= batch_size or len(buffered) >= MAX_BUFFERED_ROWS:
+            _classify_misses(misses, stats, known)
+            yield from buffered
+            buffered, misses = [], []
+
+    _classify_misses(misses, stats, known)
+    yield from buffered
+
+
+def _offline_pass(txs: Iterable[Dict], use_llm: bool, stats: Dict[str, int]) -> List[Dict]:
+    """
+    Categorizes everything rules or the local classifier can; returns the
+    rows left for the LLM (with use_llm=False they become 'other').
+    """
+    misses: List[Dict] = []
+    with span("categorize_rules"):
+        for tx in txs:
+            cat = _categorize_offline(tx, stats)
+            if cat is None and use_llm:
+                misses.append(tx)
+            else:
+                _assign(tx, cat, stats)
+    return misses
 
 
 def categorize_transactions(
@@ -14,47 +208,47 @@ def categorize_transactions(
     """
     Adds tx["category"] for every transaction using:
       1) rules first
-      2) LLM fallback for unknown (optional)
+      2) local classifier, when confident (see app.local_classifier)
+      3) LLM fallback for unknown (optional): one lookup per distinct
+         merchant/description, sent in batches
 
     Returns (txs, stats)
     """
-    stats = {
-        "total": 0,
-        "by_rules": 0,
-        "by_llm": 0,
-        "other": 0,
-    }
+    stats = new_stats()
+    misses = _offline_pass(txs, use_llm, stats)
+    _classify_misses(misses, stats)
 
-    for tx in txs:
-        stats["total"] += 1
-
-        merchant = (tx.get("merchant") or "").strip()
-        description = (tx.get("description") or "").strip()
-        amount = tx.get("amount", None)
-        currency = (tx.get("currency") or "AED").strip().upper()
+    return txs, stats
 
-        cat = categorize_by_rules(merchant, description)
 
-        if cat is not None:
-            stats["by_rules"] += 1
-        else:
-            if use_llm:
-                cat = classify_unknown_transaction_llm(
-                    merchant=merchant,
-                    description=description,
-                    amount=amount,
-                    currency=currency,
-                )
-                stats["by_llm"] += 1
-            else:
-                cat = "other"
+async def categorize_transactions_async(
+    txs: List[Dict],
+    *,
+    use_llm: bool = True,
+) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Same as categorize_transactions, for callers already inside an event loop:
+    the CPU-bound rules/local pass runs in a worker thread and the LLM
+    fallback runs concurrently, so the loop is never blocked.
+    """
+    import asyncio
 
-        if cat not in CATEGORIES:
-            cat = "other"
+    from app.llm_async import classify_unknown_transactions_llm_async
 
-        tx["category"] = cat
+    stats = new_stats()
+    misses = await asyncio.to_thread(_offline_pass, txs, use_llm, stats)
 
-        if cat == "other":
-            stats["other"] += 1
+    if misses:
+        with span("categorize_llm"):
+            known = LRUCache(MAX_KNOWN_SIGNATURES)
+            groups, pending = _group_misses(misses, known)
+            with request_metrics() as collected:
+                categories = (
+                    await classify_unknown_transactions_llm_async(_llm_items([groups[sig][0] for sig in pending]))
+                    if pending
+                    else []
+                )
+            stats["llm_calls"] += int(collected.total("llm_calls"))
+            _assign_llm_results(groups, pending, categories, known, stats)
 
     return txs, stats
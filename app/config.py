@@ -0,0 +1,51 @@
+"""
+Process configuration.
+
+Settings come from the environment, with a .env file (the nearest one in
+this directory or above) filling in what is not already set. The file is
+loaded once, when this module is first imported; every module that reads
+settings at import time does so through the helpers below, so it always
+sees .env. python-dotenv is only imported when there is a file to load.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Optional
+
+
+def _find_env_file() -> Optional[Path]:
+    here = Path(__file__).resolve().parent
+    for directory in (here, *here.parents):
+        candidate = directory / ".env"
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+ENV_FILE = _find_env_file()
+
+if ENV_FILE is not None:
+    from dotenv import load_dotenv
+
+    load_dotenv(ENV_FILE)
+
+
+def env_str(name: str, default: str = "") -> str:
+    return os.getenv(name, default).strip()
+
+
+def env_optional(name: str) -> Optional[str]:
+    """
+    The setting, or None when it is unset or blank.
+    """
+    return env_str(name) or None
+
+
+def env_int(name: str, default: int) -> int:
+    return int(env_str(name) or default)
+
+
+def env_float(name: str, default: float) -> float:
+    return float(env_str(name) or default)
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import hashlib
+from dataclasses import dataclass
 from typing import Any, Dict, List
 
+from app.metrics import span
+
 
 def _to_float(value: Any) -> float:
     try:
@@ -56,3 +60,71 @@ def build_agent_context(summary: dict) -> dict:
             if isinstance(a, dict)
         ],
     }
+
+
+def _num(value: float) -> str:
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return text if text not in ("", "-0") else "0"
+
+
+def _cell(value: Any) -> str:
+    return " ".join(str(value).replace("|", "/").split())
+
+
+def _table(name: str, columns: List[str], rows: List[List[Any]]) -> List[str]:
+    if not rows:
+        return [f"{name}: none"]
+    lines = [f"{name} ({'|'.join(columns)}):"]
+    lines.extend("|".join(_cell(value) for value in row) for row in rows)
+    return lines
+
+
+def encode_agent_context(context: dict) -> str:
+    """
+    Compact text form of build_agent_context() for prompts: one header per
+    list naming its columns, then one '|'-separated row per item, with no
+    repeated keys, quotes or trailing zeros. Carries the same facts as the
+    JSON form in roughly half the tokens.
+    """
+    lines = [
+        f"tx_count: {context.get('tx_count', 0)}",
+        f"total_spent_aed: {_num(_to_float(context.get('total_spent_aed')))}",
+    ]
+    for key in ("top_categories_aed", "top_merchants_aed"):
+        rows = [[item["name"], _num(item["amount_aed"])] for item in context.get(key, [])]
+        lines.extend(_table(key, ["name", "aed"], rows))
+    for key in ("subscriptions", "recurring_bills"):
+        rows = [
+            [item["merchant"], _num(item["approx_amount_aed"]), item["occurrences"], ",".join(map(_cell, item["dates"]))]
+            for item in context.get(key, [])
+        ]
+        lines.extend(_table(key, ["merchant", "approx_aed", "occurrences", "dates"], rows))
+    rows = [
+        [a["date"], a["merchant"], a["category"], _num(a["amount_aed"]), a["reason"]]
+        for a in context.get("anomalies", [])
+    ]
+    lines.extend(_table("anomalies", ["date", "merchant", "category", "aed", "reason"], rows))
+    return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class AgentContext:
+    """
+    build_agent_context() output with its prompt encoding and a fingerprint
+    of that encoding, computed once per summary and reused across turns.
+    """
+
+    data: Dict[str, Any]
+    text: str
+    fingerprint: str
+
+
+def prepare_agent_context(summary: dict) -> AgentContext:
+    with span("agent_context"):
+        context = build_agent_context(summary)
+        text = encode_agent_context(context)
+        return AgentContext(
+            data=context,
+            text=text,
+            fingerprint=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        )
@@ -3,7 +3,10 @@ from __future__ import annotations
 import csv
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional, TextIO
+
+from app.metrics import span
+from app.models import TransactionTable
 
 
 @dataclass
@@ -55,50 +58,84 @@ def _parse_amount(value: str) -> float:
             return 0.0
 
 
+REQUIRED_COLUMNS = {"date", "amount", "currency", "merchant", "description"}
+
+
+def _row_to_transaction(row: dict) -> Optional[Transaction]:
+    date = _parse_date(row.get("date", ""))
+    amount = _parse_amount(row.get("amount", ""))
+    currency = (row.get("currency", "") or "AED").strip().upper()
+    merchant = (row.get("merchant", "") or "").strip()
+    description = (row.get("description", "") or "").strip()
+
+    # minimal sanity checks (don’t crash MVP on bad rows)
+    if not merchant and not description:
+        # skip totally empty rows
+        return None
+
+    return Transaction(
+        date=date,
+        amount=amount,
+        currency=currency,
+        merchant=merchant,
+        description=description,
+    )
+
+
+def iter_transactions_from_file(f: TextIO) -> Iterator[Transaction]:
+    """
+    Streams Transaction objects from an open text file (or any line iterable).
+    Only the current row is held in memory.
+    """
+    reader = csv.DictReader(f)
+
+    headers = set(h.strip() for h in (reader.fieldnames or []))
+    missing = REQUIRED_COLUMNS - headers
+    if missing:
+        raise ValueError(f"CSV missing required columns: {sorted(missing)}. Found: {sorted(headers)}")
+
+    for row in reader:
+        tx = _row_to_transaction(row)
+        if tx is not None:
+            yield tx
+
+
+def iter_transactions_csv(path: str) -> Iterator[Transaction]:
+    """
+    Generator version of load_transactions_csv: yields one Transaction per row
+    so arbitrarily large statements can be processed with bounded memory.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        yield from iter_transactions_from_file(f)
+
+
+def iter_transactions_as_dicts(path: str) -> Iterator[dict]:
+    """
+    Streaming counterpart of load_transactions_as_dicts.
+    """
+    for t in iter_transactions_csv(path):
+        yield asdict(t)
+
+
 def load_transactions_csv(path: str) -> List[Transaction]:
     """
     Reads the CSV and returns a list of Transaction objects.
     Expected columns:
       date, amount, currency, merchant, description
     """
-    txs: List[Transaction] = []
+    return list(iter_transactions_csv(path))
 
-    with open(path, "r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
-
-        required = {"date", "amount", "currency", "merchant", "description"}
-        headers = set(h.strip() for h in (reader.fieldnames or []))
-        missing = required - headers
-        if missing:
-            raise ValueError(f"CSV missing required columns: {sorted(missing)}. Found: {sorted(headers)}")
-
-        for i, row in enumerate(reader, start=2):  # start=2 because header is line 1
-            date = _parse_date(row.get("date", ""))
-            amount = _parse_amount(row.get("amount", ""))
-            currency = (row.get("currency", "") or "AED").strip().upper()
-            merchant = (row.get("merchant", "") or "").strip()
-            description = (row.get("description", "") or "").strip()
-
-            # minimal sanity checks (don’t crash MVP on bad rows)
-            if not merchant and not description:
-                # skip totally empty rows
-                continue
-
-            txs.append(
-                Transaction(
-                    date=date,
-                    amount=amount,
-                    currency=currency,
-                    merchant=merchant,
-                    description=description,
-                )
-            )
-
-    return txs
+
+def load_transactions_table(path: str) -> TransactionTable:
+    """
+    Reads the CSV straight into a columnar TransactionTable (no per-row dicts).
+    """
+    with span("ingest"):
+        return TransactionTable.from_transactions(iter_transactions_csv(path))
 
 
 def load_transactions_as_dicts(path: str) -> List[dict]:
     """
     Convenience wrapper: returns list[dict] instead of dataclass objects.
     """
-    return [asdict(t) for t in load_transactions_csv(path)]
+    return list(iter_transactions_as_dicts(path))
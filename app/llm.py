@@ -1,10 +1,13 @@
-import os
 import json
-from typing import Optional
+import logging
+from typing import Any, Dict, List, Optional, Tuple
 
-from dotenv import load_dotenv
+from app.config import env_int, env_optional, env_str
+from app.llm_cache import get_llm_cache
+from app.llm_clients import get_client
+from app.llm_guard import LLMUnavailable, begin_call, llm_available, record_failure, record_success
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 # =========================
 # Fixed category whitelist
@@ -26,9 +29,87 @@ CATEGORIES = [
 # =========================
 # Environment config
 # =========================
-DEFAULT_PROVIDER = os.getenv("LLM_PROVIDER", "openai").strip().lower()
-DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
-API_KEY = os.getenv("LLM_API_KEY", "")
+DEFAULT_PROVIDER = env_str("LLM_PROVIDER", "openai").lower()
+DEFAULT_MODEL = env_str("LLM_MODEL", "gpt-4o-mini")
+API_KEY = env_str("LLM_API_KEY")
+# Optional SDK base_url override, e.g. a local stand-in server
+# (scripts/llm_stub_server.py): http://127.0.0.1:8765/v1 for OpenAI,
+# http://127.0.0.1:8765 for Anthropic.
+BASE_URL = env_optional("LLM_BASE_URL")
+
+# Bump whenever the categorization prompt changes so cached answers produced
+# by the old prompt are not reused.
+CATEGORIZE_PROMPT_VERSION = "1"
+
+
+LLM_BATCH_SIZE = max(1, env_int("LLM_BATCH_SIZE", 20))
+
+CATEGORIZE_SYSTEM_PROMPT = (
+    "You are a transaction categorization engine.\n"
+    "You must choose EXACTLY ONE category from the allowed list.\n"
+    "You must return ONLY valid JSON.\n"
+    "No explanations. No extra text."
+)
+
+BATCH_SYSTEM_PROMPT = (
+    "You are a transaction categorization engine.\n"
+    "For EACH transaction choose EXACTLY ONE category from the allowed list.\n"
+    "You must return ONLY a valid JSON array of category strings, one per transaction, in input order.\n"
+    "No explanations. No extra text."
+)
+
+
+def _complete(provider: str, model: str, system_prompt: str, user_prompt: str, max_tokens: int) -> Optional[str]:
+    """
+    Sends one prompt to the configured provider and returns the raw text.
+    Returns None for an unknown provider. Raises LLMUnavailable when the
+    circuit breaker or the request budget (app/llm_guard.py) rules the call
+    out; SDK/network errors propagate and count against the breaker.
+    """
+    if provider not in ("openai", "anthropic"):
+        return None
+
+    options, capped = begin_call()
+    client = get_client(provider, API_KEY, model, BASE_URL).with_options(**options)
+    try:
+        text = _request(client, provider, model, system_prompt, user_prompt, max_tokens)
+    except Exception as exc:
+        record_failure(exc, capped)
+        raise
+    record_success()
+    return text
+
+
+def _request(client: Any, provider: str, model: str, system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+    # =========================
+    # OpenAI (primary)
+    # =========================
+    if provider == "openai":
+        resp = client.responses.create(
+            model=model,
+            instructions=system_prompt,
+            input=user_prompt,
+            temperature=0,
+        )
+
+        return (resp.output_text or "").strip()
+
+    # =========================
+    # Anthropic (optional)
+    # =========================
+    resp = client.messages.create(
+        model=model,
+        max_tokens=max_tokens,
+        temperature=0,
+        system=system_prompt,
+        messages=[{"role": "user", "content": user_prompt}],
+    )
+
+    text = ""
+    for block in resp.content:
+        if getattr(block, "type", None) == "text":
+            text += block.text
+    return text
 
 
 def classify_unknown_transaction_llm(
@@ -43,20 +124,21 @@ def classify_unknown_transaction_llm(
     LLM fallback classifier.
     Always returns ONE category from CATEGORIES.
     If anything fails → returns 'other'.
+    Answers are cached persistently (see app/llm_cache.py), so a merchant is
+    sent to the LLM at most once.
     """
 
-    if not API_KEY:
+    cache = get_llm_cache()
+    if cache is not None:
+        cached = cache.get(merchant, description, model, CATEGORIZE_PROMPT_VERSION)
+        if cached is not None:
+            return cached
+
+    if not API_KEY or not llm_available():
         return "other"
 
     provider = (provider or DEFAULT_PROVIDER).strip().lower()
 
-    system_prompt = (
-        "You are a transaction categorization engine.\n"
-        "You must choose EXACTLY ONE category from the allowed list.\n"
-        "You must return ONLY valid JSON.\n"
-        "No explanations. No extra text."
-    )
-
     user_payload = {
         "merchant": merchant,
         "description": description,
@@ -73,55 +155,177 @@ def classify_unknown_transaction_llm(
     )
 
     try:
-        # =========================
-        # OpenAI (primary)
-        # =========================
-        if provider == "openai":
-            from openai import OpenAI
-
-            client = OpenAI(api_key=API_KEY)
-
-            resp = client.responses.create(
-                model=model,
-                instructions=system_prompt,
-                input=user_prompt,
-                temperature=0,
-            )
+        text = _complete(provider, model, CATEGORIZE_SYSTEM_PROMPT, user_prompt, max_tokens=60)
+        if text is None:
+            return "other"
+
+        category = _extract_category_from_json(text)
+        return _remember(cache, merchant, description, model, category)
 
-            text = (resp.output_text or "").strip()
-            category = _extract_category_from_json(text)
-            return category if category in CATEGORIES else "other"
+    except LLMUnavailable:
+        return "other"
+    except Exception as e:
+        logger.warning("LLM categorization failed: %r", e)
+        return "other"
 
-        # =========================
-        # Anthropic (optional)
-        # =========================
-        if provider == "anthropic":
-            from anthropic import Anthropic
 
-            client = Anthropic(api_key=API_KEY)
+def classify_unknown_transactions_llm(
+    items: List[Dict[str, Any]],
+    provider: str = DEFAULT_PROVIDER,
+    model: str = DEFAULT_MODEL,
+    batch_size: Optional[int] = None,
+) -> List[str]:
+    """
+    Batched LLM fallback classifier.
+    items: dicts with merchant, description, amount, currency.
+    Returns one category from CATEGORIES per item, in input order.
 
-            resp = client.messages.create(
-                model=model,
-                max_tokens=60,
-                temperature=0,
-                system=system_prompt,
-                messages=[{"role": "user", "content": user_prompt}],
-            )
+    Cached answers are served first; the rest are packed batch_size
+    (LLM_BATCH_SIZE) at a time into one request that must answer with a JSON
+    array of categories. Batches whose answer cannot be parsed are split in
+    half and retried; single invalid entries are retried once on their own.
+    Anything that still fails, or is skipped by the circuit breaker /
+    request budget (app/llm_guard.py), becomes 'other'.
+    """
+    results, pending = _lookup_cached(items, model)
 
-            text = ""
-            for block in resp.content:
-                if getattr(block, "type", None) == "text":
-                    text += block.text
+    if pending and API_KEY and llm_available():
+        provider = (provider or DEFAULT_PROVIDER).strip().lower()
+        size = max(1, batch_size or LLM_BATCH_SIZE)
+        for start in range(0, len(pending), size):
+            chunk = pending[start:start + size]
+            categories = _classify_batch([items[i] for i in chunk], provider, model)
+            for i, category in zip(chunk, categories):
+                results[i] = category
 
-            category = _extract_category_from_json(text)
-            return category if category in CATEGORIES else "other"
+    return [cat if cat is not None else "other" for cat in results]
 
-        return "other"
 
+def _lookup_cached(items: List[Dict[str, Any]], model: str) -> Tuple[List[Optional[str]], List[int]]:
+    """
+    Returns (results with cached categories filled in, indices still unknown).
+    """
+    results: List[Optional[str]] = [None] * len(items)
+    cache = get_llm_cache()
+
+    pending: List[int] = []
+    for i, item in enumerate(items):
+        cached = None
+        if cache is not None:
+            cached = cache.get(item.get("merchant", ""), item.get("description", ""), model, CATEGORIZE_PROMPT_VERSION)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.append(i)
+    return results, pending
+
+
+def _batch_prompt(items: List[Dict[str, Any]]) -> str:
+    payload = [
+        {
+            "merchant": item.get("merchant", ""),
+            "description": item.get("description", ""),
+            "amount": item.get("amount"),
+            "currency": item.get("currency", "AED"),
+        }
+        for item in items
+    ]
+    return (
+        f"Allowed categories: {CATEGORIES}\n"
+        f"Return ONLY a JSON array of exactly {len(items)} strings like: [\"groceries\", \"other\"]\n\n"
+        f"Transactions:\n{json.dumps(payload, ensure_ascii=False)}"
+    )
+
+
+def _classify_batch(items: List[Dict[str, Any]], provider: str, model: str, retry_invalid: bool = True) -> List[str]:
+    try:
+        text = _complete(
+            provider,
+            model,
+            BATCH_SYSTEM_PROMPT,
+            _batch_prompt(items),
+            max_tokens=20 + 12 * len(items),
+        )
+    except LLMUnavailable:
+        return ["other"] * len(items)
     except Exception as e:
-        # Keep this print during development; remove for final demo if you want
-        print("LLM ERROR:", repr(e))
-        return "other"
+        # Transport/API errors are not retried by splitting: a smaller batch
+        # would most likely fail the same way.
+        logger.warning("LLM batch of %d failed: %r", len(items), e)
+        return ["other"] * len(items)
+
+    if text is None:
+        return ["other"] * len(items)
+
+    categories = _extract_category_list(text, len(items))
+    if categories is None:
+        if len(items) == 1:
+            return ["other"]
+        mid = len(items) // 2
+        return (
+            _classify_batch(items[:mid], provider, model, retry_invalid)
+            + _classify_batch(items[mid:], provider, model, retry_invalid)
+        )
+
+    invalid = [i for i, cat in enumerate(categories) if cat not in CATEGORIES]
+    if invalid and retry_invalid and len(invalid) < len(items):
+        retried = _classify_batch([items[i] for i in invalid], provider, model, retry_invalid=False)
+        for i, category in zip(invalid, retried):
+            categories[i] = category
+
+    return _finalize_batch(items, categories, model)
+
+
+def _finalize_batch(items: List[Dict[str, Any]], categories: List[str], model: str) -> List[str]:
+    """
+    Caches valid answers and maps anything outside CATEGORIES to 'other'.
+    """
+    cache = get_llm_cache()
+    results = []
+    for item, category in zip(items, categories):
+        if category in CATEGORIES:
+            results.append(
+                _remember(cache, item.get("merchant", ""), item.get("description", ""), model, category)
+            )
+        else:
+            results.append("other")
+    return results
+
+
+def _remember(cache, merchant: str, description: str, model: str, category: str) -> str:
+    category = category if category in CATEGORIES else "other"
+    if cache is not None:
+        cache.put(merchant, description, model, CATEGORIZE_PROMPT_VERSION, category)
+    return category
+
+
+def _extract_category_list(text: str, expected: int) -> Optional[List[str]]:
+    """
+    Safely extract a JSON array of `expected` category strings from model output.
+    Returns None if no array of the right length can be found.
+    """
+
+    if not text:
+        return None
+
+    text = text.strip()
+    candidates = [text]
+    start = text.find("[")
+    end = text.rfind("]")
+    if start != -1 and end > start:
+        candidates.append(text[start:end + 1])
+
+    for candidate in candidates:
+        try:
+            obj = json.loads(candidate)
+        except Exception:
+            continue
+        if isinstance(obj, dict):
+            obj = obj.get("categories")
+        if isinstance(obj, list) and len(obj) == expected:
+            return [str(item.get("category", "") if isinstance(item, dict) else item).strip() for item in obj]
+
+    return None
 
 
 def _extract_category_from_json(text: str) -> str:
@@ -0,0 +1,250 @@
+"""
+Concurrent asyncio path for the LLM categorization fallback.
+
+Batches of unknown transactions (see classify_unknown_transactions_llm) are
+sent in parallel with the async OpenAI / Anthropic clients:
+  - at most LLM_CONCURRENCY requests in flight,
+  - request starts paced by a token bucket (LLM_RATE_LIMIT_RPS, 0 = off),
+  - every call bounded by LLM_TIMEOUT_SECONDS and the request budget,
+    and skipped while the circuit breaker is open (app/llm_guard.py),
+  - results assembled back in input order.
+
+Point LLM_BASE_URL at scripts/llm_stub_server.py to run it locally.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app import llm
+from app.config import env_float, env_int
+from app.llm import (
+    BATCH_SYSTEM_PROMPT,
+    CATEGORIES,
+    DEFAULT_MODEL,
+    DEFAULT_PROVIDER,
+    LLM_BATCH_SIZE,
+    _batch_prompt,
+    _extract_category_list,
+    _finalize_batch,
+    _lookup_cached,
+)
+from app.llm_clients import LLM_TIMEOUT_SECONDS, aclose_loop_clients, get_async_client
+from app.llm_guard import LLMUnavailable, begin_call, llm_available, record_failure, record_success
+
+logger = logging.getLogger(__name__)
+
+LLM_CONCURRENCY = max(1, env_int("LLM_CONCURRENCY", 4))
+LLM_RATE_LIMIT_RPS = env_float("LLM_RATE_LIMIT_RPS", 0)
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, bursts up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _AsyncCompleter:
+    """
+    Async SDK client (pooled per event loop, see app.llm_clients) shared by all
+    concurrent calls of a classification run.
+    """
+
+    def __init__(self, provider: str, model: str) -> None:
+        self.provider = provider
+        self.client: Any = None
+        if provider in ("openai", "anthropic"):
+            self.client = get_async_client(provider, llm.API_KEY, model, llm.BASE_URL)
+
+    async def complete(
+        self,
+        model: str,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        options: Dict[str, Any],
+    ) -> Optional[str]:
+        client = self.client.with_options(**options)
+
+        if self.provider == "openai":
+            resp = await client.responses.create(
+                model=model,
+                instructions=system_prompt,
+                input=user_prompt,
+                temperature=0,
+            )
+            return (resp.output_text or "").strip()
+
+        if self.provider == "anthropic":
+            resp = await client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=0,
+                system=system_prompt,
+                messages=[{"role": "user", "content": user_prompt}],
+            )
+            return "".join(
+                block.text for block in resp.content if getattr(block, "type", None) == "text"
+            )
+
+        return None
+
+
+class _Runner:
+    def __init__(
+        self,
+        completer: _AsyncCompleter,
+        model: str,
+        concurrency: int,
+        bucket: Optional[TokenBucket],
+        timeout: float,
+    ) -> None:
+        self.completer = completer
+        self.model = model
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = bucket
+        self.timeout = timeout
+
+    async def _call(self, items: List[Dict[str, Any]]) -> Optional[str]:
+        if self.completer.client is None:
+            return None
+
+        async with self.semaphore:
+            if self.bucket is not None:
+                await self.bucket.acquire()
+            options, capped = begin_call()
+            try:
+                text = await asyncio.wait_for(
+                    self.completer.complete(
+                        self.model,
+                        BATCH_SYSTEM_PROMPT,
+                        _batch_prompt(items),
+                        max_tokens=20 + 12 * len(items),
+                        options=options,
+                    ),
+                    timeout=min(self.timeout, options["timeout"]),
+                )
+            except Exception as exc:
+                record_failure(exc, capped and options["timeout"] <= self.timeout)
+                raise
+            record_success()
+            return text
+
+    async def classify_batch(self, items: List[Dict[str, Any]], retry_invalid: bool = True) -> List[str]:
+        """
+        Async twin of llm._classify_batch (same split/retry rules).
+        """
+        try:
+            text = await self._call(items)
+        except LLMUnavailable:
+            return ["other"] * len(items)
+        except Exception as e:
+            logger.warning("LLM batch of %d failed: %r", len(items), e)
+            return ["other"] * len(items)
+
+        if text is None:
+            return ["other"] * len(items)
+
+        categories = _extract_category_list(text, len(items))
+        if categories is None:
+            if len(items) == 1:
+                return ["other"]
+            mid = len(items) // 2
+            left, right = await asyncio.gather(
+                self.classify_batch(items[:mid], retry_invalid),
+                self.classify_batch(items[mid:], retry_invalid),
+            )
+            return left + right
+
+        invalid = [i for i, cat in enumerate(categories) if cat not in CATEGORIES]
+        if invalid and retry_invalid and len(invalid) < len(items):
+            retried = await self.classify_batch([items[i] for i in invalid], retry_invalid=False)
+            for i, category in zip(invalid, retried):
+                categories[i] = category
+
+        return _finalize_batch(items, categories, self.model)
+
+
+async def classify_unknown_transactions_llm_async(
+    items: List[Dict[str, Any]],
+    provider: str = DEFAULT_PROVIDER,
+    model: str = DEFAULT_MODEL,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    rate_per_sec: Optional[float] = None,
+    timeout: Optional[float] = None,
+) -> List[str]:
+    """
+    Concurrent version of classify_unknown_transactions_llm.
+    Returns one category per item, in input order.
+    """
+    results, pending = _lookup_cached(items, model)
+
+    if pending and llm.API_KEY and llm_available():
+        provider = (provider or DEFAULT_PROVIDER).strip().lower()
+        size = max(1, batch_size or LLM_BATCH_SIZE)
+        rate = LLM_RATE_LIMIT_RPS if rate_per_sec is None else rate_per_sec
+        timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+        chunks = [pending[start:start + size] for start in range(0, len(pending), size)]
+
+        runner = _Runner(
+            _AsyncCompleter(provider, model),
+            model,
+            concurrency=max(1, concurrency or LLM_CONCURRENCY),
+            bucket=TokenBucket(rate) if rate > 0 else None,
+            timeout=timeout,
+        )
+        answers = await asyncio.gather(
+            *(runner.classify_batch([items[i] for i in chunk]) for chunk in chunks)
+        )
+
+        for chunk, categories in zip(chunks, answers):
+            for i, category in zip(chunk, categories):
+                results[i] = category
+
+    return [cat if cat is not None else "other" for cat in results]
+
+
+async def _classify_in_new_loop(items: List[Dict[str, Any]], batch_size: int) -> List[str]:
+    try:
+        return await classify_unknown_transactions_llm_async(items, batch_size=batch_size)
+    finally:
+        await aclose_loop_clients()
+
+
+def classify_unknown_transactions(items: List[Dict[str, Any]], batch_size: Optional[int] = None) -> List[str]:
+    """
+    Sync entry point used by categorize_transactions: runs the concurrent path
+    when it can help (LLM_CONCURRENCY > 1, more than one batch, no event loop
+    already running in this thread), otherwise the sequential batched path.
+    """
+    size = max(1, batch_size or LLM_BATCH_SIZE)
+    if LLM_CONCURRENCY <= 1 or len(items) <= size or not llm.API_KEY:
+        return llm.classify_unknown_transactions_llm(items, batch_size=size)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_classify_in_new_loop(items, size))
+    return llm.classify_unknown_transactions_llm(items, batch_size=size)
@@ -0,0 +1,248 @@
+"""
+Persistent cache for LLM categorization results.
+
+A merchant should be sent to the LLM at most once, across runs and process
+restarts. Results are stored in a local SQLite file keyed by
+(normalized merchant, normalized description, model, prompt version), kept
+in memory after warm-up, and expire after LLM_CACHE_TTL_DAYS.
+
+CLI:
+    python -m app.llm_cache stats
+    python -m app.llm_cache export cache.json
+    python -m app.llm_cache import cache.json
+    python -m app.llm_cache purge
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.config import env_str
+from app.metrics import count
+from app.rules import normalize_merchant
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CACHE_PATH = REPO_ROOT / "data" / "llm_cache.sqlite3"
+
+LLM_CACHE_PATH = env_str("LLM_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+LLM_CACHE_TTL_DAYS = float(env_str("LLM_CACHE_TTL_DAYS", "30") or 0)
+
+CacheKey = Tuple[str, str, str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_categories (
+    merchant TEXT NOT NULL,
+    description TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    category TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (merchant, description, model, prompt_version)
+)
+"""
+
+
+def normalize_signature(merchant: str, description: str) -> Tuple[str, str]:
+    """
+    (merchant, description) as cached: rows that differ only in case,
+    spacing or merchant noise get the same category.
+    """
+    return normalize_merchant(merchant or "").upper(), " ".join((description or "").split()).lower()
+
+
+def cache_key(merchant: str, description: str, model: str, prompt_version: str) -> CacheKey:
+    return (*normalize_signature(merchant, description), model, prompt_version)
+
+
+class LLMCategoryCache:
+    """
+    SQLite-backed category cache with an in-memory front.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._lock = threading.Lock()
+        self._memory: Dict[CacheKey, Tuple[str, float]] = {}
+        self._warm = False
+        self.hits = 0
+        self.misses = 0
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def warm(self) -> int:
+        """
+        Drops expired rows and loads the rest into memory. Returns the number loaded.
+        """
+        now = time.time()
+        with self._lock:
+            if self.ttl_seconds is not None:
+                self._conn.execute(
+                    "DELETE FROM llm_categories WHERE created_at < ?",
+                    (now - self.ttl_seconds,),
+                )
+                self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT merchant, description, model, prompt_version, category, created_at "
+                "FROM llm_categories"
+            ).fetchall()
+            self._memory = {tuple(row[:4]): (row[4], row[5]) for row in rows}
+            self._warm = True
+            return len(self._memory)
+
+    def get(self, merchant: str, description: str, model: str, prompt_version: str) -> Optional[str]:
+        if not self._warm:
+            self.warm()
+        key = cache_key(merchant, description, model, prompt_version)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None or self._expired(entry[1], time.time()):
+                self.misses += 1
+                category = None
+            else:
+                self.hits += 1
+                category = entry[0]
+        count("cache_lookups", cache="llm_category", result="miss" if category is None else "hit")
+        return category
+
+    def put(
+        self,
+        merchant: str,
+        description: str,
+        model: str,
+        prompt_version: str,
+        category: str,
+    ) -> None:
+        key = cache_key(merchant, description, model, prompt_version)
+        self._store([(key, category, time.time())])
+
+    def _store(self, entries: List[Tuple[CacheKey, str, float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO llm_categories "
+                "(merchant, description, model, prompt_version, category, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, category, created_at) for key, category, created_at in entries],
+            )
+            self._conn.commit()
+            for key, category, created_at in entries:
+                self._memory[key] = (category, created_at)
+
+    def entries(self) -> List[Tuple[str, str, str]]:
+        """
+        Unexpired (merchant, description, category) triples, any model/prompt version.
+        """
+        if not self._warm:
+            self.warm()
+        now = time.time()
+        with self._lock:
+            return [
+                (key[0], key[1], category)
+                for key, (category, created_at) in self._memory.items()
+                if not self._expired(created_at, now)
+            ]
+
+    def purge(self) -> int:
+        with self._lock:
+            count = self._conn.execute("DELETE FROM llm_categories").rowcount
+            self._conn.commit()
+            self._memory.clear()
+            return count
+
+    def export_json(self, path: str) -> int:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT merchant, description, model, prompt_version, category, created_at "
+                "FROM llm_categories ORDER BY merchant, description"
+            ).fetchall()
+        entries = [
+            dict(zip(("merchant", "description", "model", "prompt_version", "category", "created_at"), row))
+            for row in rows
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        return len(entries)
+
+    def import_json(self, path: str) -> int:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        now = time.time()
+        self._store(
+            [
+                (
+                    cache_key(e["merchant"], e.get("description", ""), e["model"], e["prompt_version"]),
+                    str(e["category"]),
+                    float(e.get("created_at") or now),
+                )
+                for e in entries
+            ]
+        )
+        return len(entries)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl_days": self.ttl_seconds / 86400 if self.ttl_seconds else None,
+            }
+
+
+_CACHE: Optional[LLMCategoryCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCategoryCache]:
+    """
+    Process-wide cache, or None when LLM_CACHE_PATH is set to an empty string.
+    """
+    global _CACHE
+    if not LLM_CACHE_PATH:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = LLMCategoryCache(LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL_DAYS * 86400)
+    return _CACHE
+
+
+def main(argv: List[str]) -> int:
+    cache = get_llm_cache()
+    if cache is None:
+        print("LLM cache is disabled (LLM_CACHE_PATH is empty).")
+        return 1
+
+    command = argv[0] if argv else "stats"
+    if command == "stats":
+        cache.warm()
+        print(json.dumps(cache.stats(), indent=2))
+    elif command == "export" and len(argv) == 2:
+        print(f"Exported {cache.export_json(argv[1])} entries to {argv[1]}")
+    elif command == "import" and len(argv) == 2:
+        print(f"Imported {cache.import_json(argv[1])} entries from {argv[1]}")
+    elif command == "purge":
+        print(f"Removed {cache.purge()} entries")
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,142 @@
+"""
+Process-wide registry of LLM SDK clients.
+
+Building an OpenAI/Anthropic client per call throws away HTTP keep-alive,
+TLS sessions and the connection pool. Clients are created once per
+(provider, api key, model, base url) and shared: sync clients across all
+threads (the underlying httpx.Client is thread-safe), async clients per
+event loop (httpx.AsyncClient connections belong to the loop that made them).
+
+Tuning:
+    LLM_POOL_SIZE        max connections per client (default 10)
+    LLM_TIMEOUT_SECONDS  request timeout (default 20)
+    LLM_MAX_RETRIES      SDK retries on connection errors / 429 / 5xx (default 2)
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import env_float, env_int
+
+LLM_POOL_SIZE = max(1, env_int("LLM_POOL_SIZE", 10))
+LLM_TIMEOUT_SECONDS = env_float("LLM_TIMEOUT_SECONDS", 20)
+LLM_MAX_RETRIES = max(0, env_int("LLM_MAX_RETRIES", 2))
+
+ClientKey = Tuple[str, str, str, Optional[str]]
+
+_LOCK = threading.Lock()
+_SYNC_CLIENTS: Dict[ClientKey, Any] = {}
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[ClientKey, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+_STATS = {"created": 0, "reused": 0}
+
+
+def _limits() -> Any:
+    import httpx
+
+    return httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE)
+
+
+def _build_client(provider: str, api_key: str, base_url: Optional[str], is_async: bool) -> Any:
+    import httpx
+
+    options = {"api_key": api_key, "base_url": base_url, "timeout": LLM_TIMEOUT_SECONDS, "max_retries": LLM_MAX_RETRIES}
+
+    if provider == "openai":
+        if is_async:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            return AsyncOpenAI(**options, http_client=DefaultAsyncHttpxClient(limits=_limits()))
+        from openai import DefaultHttpxClient, OpenAI
+
+        return OpenAI(**options, http_client=DefaultHttpxClient(limits=_limits()))
+
+    if provider == "anthropic":
+        if is_async:
+            from anthropic import AsyncAnthropic
+
+            return AsyncAnthropic(**options, http_client=httpx.AsyncClient(limits=_limits()))
+        from anthropic import Anthropic
+
+        return Anthropic(**options, http_client=httpx.Client(limits=_limits()))
+
+    raise ValueError(f"Unsupported LLM provider: {provider!r}")
+
+
+def get_client(provider: str, api_key: str, model: str = "", base_url: Optional[str] = None) -> Any:
+    """
+    Shared sync client for this provider/key/model/base_url.
+    """
+    key = (provider, api_key, model, base_url)
+    # One uncontended lock per call also keeps the reuse counter exact.
+    with _LOCK:
+        client = _SYNC_CLIENTS.get(key)
+        if client is None:
+            client = _SYNC_CLIENTS[key] = _build_client(provider, api_key, base_url, is_async=False)
+            _STATS["created"] += 1
+        else:
+            _STATS["reused"] += 1
+        return client
+
+
+def get_async_client(provider: str, api_key: str, model: str = "", base_url: Optional[str] = None) -> Any:
+    """
+    Shared async client for the running event loop. Must be called from a coroutine.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    key = (provider, api_key, model, base_url)
+
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = _build_client(provider, api_key, base_url, is_async=True)
+            _STATS["created"] += 1
+        else:
+            _STATS["reused"] += 1
+        return client
+
+
+async def aclose_loop_clients() -> None:
+    """
+    Closes the async clients of the running loop. Call before a short-lived
+    loop (asyncio.run) finishes so its sockets are not left to the GC.
+    """
+    import asyncio
+
+    with _LOCK:
+        clients = _ASYNC_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+
+def client_stats() -> Dict[str, int]:
+    with _LOCK:
+        return {
+            "sync_clients": len(_SYNC_CLIENTS),
+            "async_clients": sum(len(clients) for clients in _ASYNC_CLIENTS.values()),
+            **_STATS,
+        }
+
+
+def close_clients() -> None:
+    """
+    Closes and forgets all sync clients (see aclose_loop_clients for async ones).
+    """
+    with _LOCK:
+        clients = list(_SYNC_CLIENTS.values())
+        _SYNC_CLIENTS.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
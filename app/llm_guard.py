@@ -0,0 +1,240 @@
+"""
+Circuit breaker and per-request latency budget for LLM calls.
+
+A slow or failing provider must not hold /chat for the full SDK timeout on
+every call. Entry points check `llm_available()`; every provider call goes
+through `begin_call()`, which also sizes its timeout:
+
+  - the breaker opens after LLM_BREAKER_FAILURES consecutive failures and
+    short-circuits every call for LLM_BREAKER_RESET_SECONDS, then lets a
+    single trial call through (half-open) to decide whether to close again;
+  - `llm_deadline(seconds)` sets a budget for everything done in the current
+    context (thread or task); once it is spent, calls are skipped. A call
+    whose timeout the budget cut short and that then times out is only a
+    fallback: the turn ran out of time, which says nothing about the provider.
+
+Skipped or failed calls fall back to rules/'other' and _fallback_answer.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.config import env_float, env_int
+from app.llm_clients import LLM_MAX_RETRIES, LLM_TIMEOUT_SECONDS
+from app.metrics import count
+
+LLM_BREAKER_FAILURES = max(1, env_int("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_RESET_SECONDS = env_float("LLM_BREAKER_RESET_SECONDS", 30)
+LLM_REQUEST_BUDGET_SECONDS = env_float("LLM_REQUEST_BUDGET_SECONDS", 8)
+
+# Calls are not started with less than this much budget left.
+MIN_CALL_SECONDS = 0.25
+
+
+class LLMUnavailable(Exception):
+    """Raised instead of calling the provider when the breaker is open or the budget is spent."""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe consecutive-failure breaker: closed -> open -> half_open -> closed.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.total_failures = 0
+        self.total_successes = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    def blocked(self) -> bool:
+        """
+        True while open and still cooling down (does not use up the half-open trial).
+        """
+        with self._lock:
+            return self._state == "open" and time.monotonic() - self._opened_at < self.reset_seconds
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = "half_open"
+                self._trial_in_flight = False
+            if self._state == "closed":
+                return True
+            if self._state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.total_successes += 1
+            self._failures = 0
+            self._state = "closed"
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.total_failures += 1
+            self._failures += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self.times_opened += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """
+        Ends a call without a verdict; a half-open breaker lets the next one trial.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self._state == "open":
+                retry_in = round(max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at)), 3)
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_seconds": self.reset_seconds,
+                "retry_in_seconds": retry_in,
+                "times_opened": self.times_opened,
+                "short_circuited": self.short_circuited,
+                "total_failures": self.total_failures,
+                "total_successes": self.total_successes,
+            }
+
+
+LLM_BREAKER = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS)
+
+
+class _Budget:
+    def __init__(self, seconds: float) -> None:
+        self.deadline = time.monotonic() + seconds
+        self.fallbacks = 0
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+
+_BUDGET: contextvars.ContextVar[Optional[_Budget]] = contextvars.ContextVar("llm_budget", default=None)
+
+
+@contextmanager
+def llm_deadline(seconds: Optional[float] = None) -> Iterator[_Budget]:
+    """
+    Bounds the total LLM time of everything run inside the block.
+    """
+    budget = _Budget(LLM_REQUEST_BUDGET_SECONDS if seconds is None else seconds)
+    token = _BUDGET.set(budget)
+    try:
+        yield budget
+    finally:
+        _BUDGET.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """
+    Seconds left in the current budget, or None outside llm_deadline().
+    """
+    budget = _BUDGET.get()
+    return None if budget is None else budget.remaining()
+
+
+def fallback_count() -> int:
+    """
+    LLM calls skipped or failed so far under the current budget.
+    """
+    budget = _BUDGET.get()
+    return 0 if budget is None else budget.fallbacks
+
+
+def _note_fallback() -> None:
+    count("llm_fallbacks")
+    budget = _BUDGET.get()
+    if budget is not None:
+        budget.fallbacks += 1
+
+
+def _budget_spent() -> bool:
+    remaining = remaining_budget()
+    return remaining is not None and remaining < MIN_CALL_SECONDS
+
+
+def llm_available() -> bool:
+    """
+    Cheap pre-check for entry points: False when the breaker is open or the
+    current budget is (nearly) spent. A False answer counts as a fallback.
+    """
+    if _budget_spent() or LLM_BREAKER.blocked():
+        _note_fallback()
+        return False
+    return True
+
+
+def begin_call() -> Tuple[Dict[str, Any], bool]:
+    """
+    Admits one provider call or raises LLMUnavailable. Returns per-call SDK
+    options and whether their timeout was capped by the remaining budget;
+    retries are disabled under a budget so one call cannot outlive it. The
+    caller must report the outcome with record_success() /
+    record_failure(exc, budget_capped).
+    """
+    if _budget_spent() or not LLM_BREAKER.allow():
+        _note_fallback()
+        raise LLMUnavailable("LLM breaker open or request budget spent")
+
+    remaining = remaining_budget()
+    if remaining is None:
+        return {"timeout": LLM_TIMEOUT_SECONDS, "max_retries": LLM_MAX_RETRIES}, False
+    return {"timeout": max(0.0, min(LLM_TIMEOUT_SECONDS, remaining)), "max_retries": 0}, remaining < LLM_TIMEOUT_SECONDS
+
+
+def record_success() -> None:
+    LLM_BREAKER.record_success()
+    count("llm_calls", outcome="success")
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    # asyncio/builtin TimeoutError, openai/anthropic APITimeoutError, httpx.TimeoutException.
+    return any(cls.__name__ in ("TimeoutError", "APITimeoutError", "TimeoutException") for cls in type(exc).__mro__)
+
+
+def record_failure(exc: Optional[BaseException] = None, budget_capped: bool = False) -> None:
+    """
+    Counts a failed call against the breaker, unless it timed out on a
+    timeout the request budget had capped.
+    """
+    if budget_capped and exc is not None and _is_timeout(exc):
+        LLM_BREAKER.release_trial()
+        count("llm_calls", outcome="budget_timeout")
+    else:
+        LLM_BREAKER.record_failure()
+        count("llm_calls", outcome="failure")
+    _note_fallback()
+
+
+def breaker_state() -> Dict[str, Any]:
+    return LLM_BREAKER.state()
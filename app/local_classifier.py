@@ -0,0 +1,301 @@
+"""
+Offline classifier tier between the regex rules and the LLM fallback.
+
+A multinomial naive Bayes model over character n-grams and word tokens of
+the (normalized merchant, description) signature. It is trained from
+rule-labelled transaction history plus answers already in the LLM cache,
+runs in-process in microseconds, and only answers when its posterior is at
+least LOCAL_CLASSIFIER_THRESHOLD; everything else still goes to the LLM.
+
+The model is a JSON file (LOCAL_CLASSIFIER_PATH, empty disables the tier).
+Without a trained file the tier is a no-op.
+
+CLI:
+    python -m app.local_classifier train [csv ...]
+    python -m app.local_classifier eval [csv ...] [--folds 5] [--threshold 0.999]
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.cache import LRUCache
+from app.config import env_float, env_str
+from app.rules import categorize_by_rules, normalize_merchant
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MODEL_PATH = REPO_ROOT / "data" / "local_classifier.json"
+DEFAULT_TRAINING_CSV = REPO_ROOT / "data" / "sample_transactions.csv"
+
+LOCAL_CLASSIFIER_PATH = env_str("LOCAL_CLASSIFIER_PATH", str(DEFAULT_MODEL_PATH))
+LOCAL_CLASSIFIER_THRESHOLD = env_float("LOCAL_CLASSIFIER_THRESHOLD", 0.999)
+
+NGRAM_RANGE = (2, 4)
+
+Example = Tuple[str, str, str]  # (merchant, description, category)
+
+
+def signature_text(merchant: str, description: str) -> str:
+    merchant = normalize_merchant(merchant or "").lower()
+    description = " ".join((description or "").lower().split())
+    return f"{merchant} | {description}" if description else merchant
+
+
+def features(text: str) -> Counter:
+    counts: Counter = Counter()
+    for word in text.split():
+        if word != "|":
+            counts["w:" + word] += 1
+    padded = f" {text} "
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        for i in range(len(padded) - n + 1):
+            counts[padded[i:i + n]] += 1
+    return counts
+
+
+class NaiveBayesClassifier:
+    """
+    Multinomial naive Bayes with additive smoothing.
+    `predict` returns (category, posterior probability).
+    """
+
+    def __init__(self, alpha: float = 0.5) -> None:
+        self.alpha = alpha
+        self.class_counts: Dict[str, int] = {}
+        self.feature_counts: Dict[str, Dict[str, int]] = {}
+        self._compiled = False
+        self._predictions = LRUCache(maxsize=65536)
+
+    def fit(self, examples: Iterable[Example]) -> "NaiveBayesClassifier":
+        class_counts: Counter = Counter()
+        feature_counts: Dict[str, Counter] = defaultdict(Counter)
+        for merchant, description, category in examples:
+            class_counts[category] += 1
+            feature_counts[category].update(features(signature_text(merchant, description)))
+
+        self.class_counts = dict(class_counts)
+        self.feature_counts = {cat: dict(counts) for cat, counts in feature_counts.items()}
+        self._compiled = False
+        self._predictions.clear()
+        return self
+
+    def _compile(self) -> None:
+        """
+        Turns counts into per-class log-probability tables: a default for
+        features unseen in a class plus a delta for the ones it has seen.
+        """
+        self._classes = sorted(self.class_counts)
+        vocabulary = set()
+        for counts in self.feature_counts.values():
+            vocabulary.update(counts)
+
+        n_docs = sum(self.class_counts.values())
+        size = len(vocabulary)
+        self._priors = [math.log(self.class_counts[cat] / n_docs) for cat in self._classes]
+        self._defaults = []
+        deltas: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+
+        for idx, cat in enumerate(self._classes):
+            counts = self.feature_counts.get(cat, {})
+            denominator = sum(counts.values()) + self.alpha * size
+            default = math.log(self.alpha / denominator)
+            self._defaults.append(default)
+            for feature, count in counts.items():
+                deltas[feature].append((idx, math.log((count + self.alpha) / denominator) - default))
+
+        self._deltas = dict(deltas)
+        self._compiled = True
+        self._predictions.clear()
+
+    def predict_text(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Memoized prediction for an already-built signature_text().
+        """
+        return self._predictions.get_or_compute(text, lambda: self._predict(text))
+
+    def _predict(self, text: str) -> Tuple[Optional[str], float]:
+        if not self._compiled:
+            self._compile()
+        if not self._classes:
+            return None, 0.0
+
+        scores = list(self._priors)
+        known = 0
+        for feature, count in features(text).items():
+            deltas = self._deltas.get(feature)
+            if deltas is None:
+                continue
+            known += count
+            for idx, delta in deltas:
+                scores[idx] += count * delta
+        for idx, default in enumerate(self._defaults):
+            scores[idx] += known * default
+
+        best = max(range(len(scores)), key=scores.__getitem__)
+        top = scores[best]
+        total = sum(math.exp(score - top) for score in scores)
+        return self._classes[best], 1.0 / total
+
+    def predict(self, merchant: str, description: str) -> Tuple[Optional[str], float]:
+        return self.predict_text(signature_text(merchant, description))
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": 1,
+            "alpha": self.alpha,
+            "ngram_range": list(NGRAM_RANGE),
+            "class_counts": self.class_counts,
+            "feature_counts": self.feature_counts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NaiveBayesClassifier":
+        model = cls(alpha=float(data.get("alpha", 0.5)))
+        model.class_counts = {k: int(v) for k, v in data["class_counts"].items()}
+        model.feature_counts = data["feature_counts"]
+        return model
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def training_examples(csv_paths: Sequence[str]) -> List[Example]:
+    """
+    Rule-labelled rows from the given CSVs plus LLM-cached answers,
+    one example per distinct signature.
+    """
+    from app.ingest import iter_transactions_as_dicts
+    from app.llm_cache import get_llm_cache
+
+    examples: Dict[str, Example] = {}
+
+    cache = get_llm_cache()
+    if cache is not None:
+        for merchant, description, category in cache.entries():
+            examples[signature_text(merchant, description)] = (merchant, description, category)
+
+    for path in csv_paths:
+        for tx in iter_transactions_as_dicts(path):
+            merchant, description = tx.get("merchant") or "", tx.get("description") or ""
+            category = categorize_by_rules(merchant, description)
+            if category is not None:
+                examples[signature_text(merchant, description)] = (merchant, description, category)
+
+    return list(examples.values())
+
+
+_MODEL: Optional[NaiveBayesClassifier] = None
+_MODEL_LOADED = False
+_MODEL_LOCK = threading.Lock()
+
+
+def get_local_classifier() -> Optional[NaiveBayesClassifier]:
+    """
+    Process-wide model, or None when disabled or not trained yet.
+    """
+    global _MODEL, _MODEL_LOADED
+    if not _MODEL_LOADED:
+        with _MODEL_LOCK:
+            if not _MODEL_LOADED:
+                if LOCAL_CLASSIFIER_PATH and Path(LOCAL_CLASSIFIER_PATH).exists():
+                    _MODEL = NaiveBayesClassifier.load(LOCAL_CLASSIFIER_PATH)
+                _MODEL_LOADED = True
+    return _MODEL
+
+
+def classify_locally(merchant: str, description: str) -> Optional[str]:
+    """
+    Category when the local model is confident enough, else None.
+    """
+    model = get_local_classifier()
+    if model is None:
+        return None
+    category, confidence = model.predict(merchant, description)
+    return category if confidence >= LOCAL_CLASSIFIER_THRESHOLD else None
+
+
+def evaluate(examples: List[Example], folds: int = 5, threshold: float = LOCAL_CLASSIFIER_THRESHOLD) -> Dict[str, float]:
+    """
+    k-fold cross-validation: overall accuracy, share of examples answered at
+    `threshold` (coverage) and accuracy on those, plus prediction throughput.
+    """
+    shuffled = list(examples)
+    random.Random(0).shuffle(shuffled)
+    folds = max(2, min(folds, len(shuffled)))
+
+    correct = answered = answered_correct = 0
+    predict_seconds = 0.0
+    for k in range(folds):
+        test = shuffled[k::folds]
+        train = [ex for i, ex in enumerate(shuffled) if i % folds != k]
+        model = NaiveBayesClassifier().fit(train)
+        model._compile()
+        texts = [signature_text(m, d) for m, d, _ in test]
+
+        started = time.perf_counter()
+        predictions = [model._predict(text) for text in texts]
+        predict_seconds += time.perf_counter() - started
+
+        for (_, _, expected), (category, confidence) in zip(test, predictions):
+            correct += category == expected
+            if confidence >= threshold:
+                answered += 1
+                answered_correct += category == expected
+
+    n = len(shuffled)
+    return {
+        "examples": n,
+        "folds": folds,
+        "accuracy": correct / n if n else 0.0,
+        "threshold": threshold,
+        "coverage": answered / n if n else 0.0,
+        "accuracy_at_threshold": answered_correct / answered if answered else 0.0,
+        "predictions_per_sec": n / predict_seconds if predict_seconds else 0.0,
+        "us_per_prediction": predict_seconds / n * 1e6 if n else 0.0,
+    }
+
+
+def main(argv: List[str]) -> int:
+    command = argv[0] if argv else ""
+    args = argv[1:]
+    options = {"--folds": 5.0, "--threshold": LOCAL_CLASSIFIER_THRESHOLD}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = float(args[i + 1])
+            args = args[:i] + args[i + 2:]
+    csv_paths = args or [str(DEFAULT_TRAINING_CSV)]
+
+    if command == "train":
+        if not LOCAL_CLASSIFIER_PATH:
+            print("Local classifier is disabled (LOCAL_CLASSIFIER_PATH is empty).")
+            return 1
+        examples = training_examples(csv_paths)
+        model = NaiveBayesClassifier().fit(examples)
+        model.save(LOCAL_CLASSIFIER_PATH)
+        print(f"Trained on {len(examples)} examples ({len(model.class_counts)} categories) -> {LOCAL_CLASSIFIER_PATH}")
+    elif command == "eval":
+        print(json.dumps(evaluate(training_examples(csv_paths), folds=int(options["--folds"]), threshold=options["--threshold"]), indent=2))
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
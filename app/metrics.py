@@ -0,0 +1,207 @@
+"""
+Stage timings and counters for the chat pipeline.
+
+`span(stage)` times one pipeline stage (ingest, categorization, summary,
+answer, ...) into a process-wide histogram; `count(name, **labels)` bumps a
+counter (LLM calls, cache lookups, fallbacks). Both are cheap enough to
+leave on everywhere: a span is two perf_counter() calls and a locked bucket
+update.
+
+Inside `request_metrics()` the same spans and counters are also collected
+per request, so an entry point can report where one turn spent its time.
+Blocks nest: an inner block sees only its own share and hands it on to the
+enclosing one when it exits.
+Stages nest (e.g. "chat" contains "summary", which contains "ingest"), so
+per-stage totals do not add up to the request time.
+
+`render_prometheus()` returns everything in the Prometheus text format
+(served at /metrics).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+METRICS_PREFIX = "wmm"
+
+# Upper bounds in seconds; stages range from sub-millisecond (rules over a
+# small CSV) to several seconds (LLM calls).
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_COUNTER_HELP = {
+    "llm_calls": "Provider calls made, by outcome.",
+    "llm_fallbacks": "LLM calls skipped (breaker open, budget spent) or failed.",
+    "cache_lookups": "Cache lookups, by cache and result.",
+}
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """
+    Thread-safe stage histograms (labelled by stage) and labelled counters.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _Histogram] = {}
+        self._counters: Dict[Tuple[str, LabelSet], float] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = _Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def inc(self, name: str, labels: LabelSet, value: float = 1) -> None:
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            stages = {stage: (list(h.counts), h.sum) for stage, h in self._stages.items()}
+            counters = dict(self._counters)
+
+        name = f"{METRICS_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each chat pipeline stage (stages nest).",
+            f"# TYPE {name} histogram",
+        ]
+        for stage in sorted(stages):
+            counts, total = stages[stage]
+            cumulative = 0
+            for bound, n in zip([*map(_number, self.buckets), "+Inf"], counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {_number(total)}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {cumulative}')
+
+        for counter in sorted({counter for counter, _ in counters} | set(_COUNTER_HELP)):
+            name = f"{METRICS_PREFIX}_{counter}_total"
+            lines.append(f"# HELP {name} {_COUNTER_HELP.get(counter, counter)}")
+            lines.append(f"# TYPE {name} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == counter:
+                    lines.append(f"{name}{_label_text(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _label_text(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+METRICS = MetricsRegistry()
+
+
+class RequestMetrics:
+    """
+    Spans and counters of one request. Appends only, so worker threads and
+    tasks of the same request can record into it without a lock.
+    """
+
+    def __init__(self) -> None:
+        self.spans: List[Tuple[str, float]] = []
+        self.counts: List[Tuple[str, float]] = []
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        """
+        {"stages_ms": {stage: total ms}, "counters": {name[.label...]: total}}
+        """
+        stages: Dict[str, float] = {}
+        for stage, seconds in self.spans:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+        counters: Dict[str, float] = {}
+        for key, value in self.counts:
+            counters[key] = counters.get(key, 0) + value
+        return {
+            "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in stages.items()},
+            "counters": counters,
+        }
+
+    def total(self, name: str) -> float:
+        """
+        Sum of counter `name` over all its labels.
+        """
+        return sum(value for key, value in self.counts if key == name or key.startswith(name + "."))
+
+
+_REQUEST: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar("request_metrics", default=None)
+
+
+@contextmanager
+def request_metrics() -> Iterator[RequestMetrics]:
+    """
+    Collects the spans and counters recorded in the current context (thread
+    or task, and threads started from it with asyncio.to_thread).
+    """
+    outer = _REQUEST.get()
+    collected = RequestMetrics()
+    token = _REQUEST.set(collected)
+    try:
+        yield collected
+    finally:
+        _REQUEST.reset(token)
+        if outer is not None:
+            outer.spans.extend(collected.spans)
+            outer.counts.extend(collected.counts)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Times the block as `stage`, also when it raises.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        METRICS.observe(stage, seconds)
+        collected = _REQUEST.get()
+        if collected is not None:
+            collected.spans.append((stage, seconds))
+
+
+def count(name: str, value: float = 1, **labels: str) -> None:
+    """
+    Adds value to counter `name` with the given labels (see _COUNTER_HELP).
+    """
+    label_set = tuple(labels.items())
+    METRICS.inc(name, label_set, value)
+    collected = _REQUEST.get()
+    if collected is not None:
+        collected.counts.append((".".join([name, *labels.values()]), value))
+
+
+def render_prometheus() -> str:
+    return METRICS.render()
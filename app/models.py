@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import MutableMapping
+from datetime import date as _date
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+NO_CATEGORY = -1
+
+_FIELDS = ("date", "amount", "currency", "merchant", "description", "category")
+
+
+class _Interner:
+    """
+    Maps repeated strings to small int codes (and back).
+    """
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+
+def _date_to_ordinal(value: str) -> int:
+    """
+    Day ordinal for canonical 'YYYY-MM-DD' strings, 0 for anything else.
+    """
+    try:
+        d = _date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return 0
+    return d.toordinal() if d.isoformat() == value else 0
+
+
+class TransactionTable:
+    """
+    Columnar, array-backed transaction storage.
+
+      amounts      array('d')  float64 per row
+      dates        array('i')  proleptic day ordinal, 0 when missing/unparseable
+      *_codes      array('i')  codes into the interned merchants / descriptions /
+                               currencies / categories lists (-1 = no category)
+
+    Around 28 bytes per row plus one copy of each distinct string, versus
+    several hundred bytes for a dict per row. Iterating the table (or calling
+    rows()) yields dict-like TransactionRow views, so code written for
+    List[Dict] keeps working unchanged.
+    """
+
+    def __init__(self) -> None:
+        self.amounts = array("d")
+        self.dates = array("i")
+        self.currency_codes = array("i")
+        self.merchant_codes = array("i")
+        self.description_codes = array("i")
+        self.category_codes = array("i")
+
+        self._currencies = _Interner()
+        self._merchants = _Interner()
+        self._descriptions = _Interner()
+        self._categories = _Interner()
+        # Unparseable date strings are kept verbatim, like ingest does for dicts.
+        self._raw_dates: Dict[int, str] = {}
+        self._ordinals: Dict[str, int] = {}
+
+    # ---- dictionaries -------------------------------------------------
+
+    @property
+    def currencies(self) -> List[str]:
+        return self._currencies.values
+
+    @property
+    def merchants(self) -> List[str]:
+        return self._merchants.values
+
+    @property
+    def descriptions(self) -> List[str]:
+        return self._descriptions.values
+
+    @property
+    def categories(self) -> List[str]:
+        return self._categories.values
+
+    # ---- construction -------------------------------------------------
+
+    def append(
+        self,
+        date: str,
+        amount: float,
+        currency: str,
+        merchant: str,
+        description: str,
+        category: Optional[str] = None,
+    ) -> None:
+        date = date or ""
+        ordinal = self._ordinals.get(date)
+        if ordinal is None:
+            ordinal = self._ordinals[date] = _date_to_ordinal(date)
+        if not ordinal and date:
+            self._raw_dates[len(self.amounts)] = date
+
+        self.amounts.append(float(amount or 0))
+        self.dates.append(ordinal)
+        self.currency_codes.append(self._currencies.code(currency or ""))
+        self.merchant_codes.append(self._merchants.code(merchant or ""))
+        self.description_codes.append(self._descriptions.code(description or ""))
+        self.category_codes.append(
+            NO_CATEGORY if category is None else self._categories.code(category)
+        )
+
+    @classmethod
+    def from_dicts(cls, rows: Iterable[Dict[str, Any]]) -> "TransactionTable":
+        table = cls()
+        for row in rows:
+            table.append(
+                date=str(row.get("date") or ""),
+                amount=row.get("amount", 0),
+                currency=str(row.get("currency") or ""),
+                merchant=str(row.get("merchant") or ""),
+                description=str(row.get("description") or ""),
+                category=row.get("category"),
+            )
+        return table
+
+    @classmethod
+    def from_transactions(cls, txs: Iterable[Any]) -> "TransactionTable":
+        table = cls()
+        for tx in txs:
+            table.append(tx.date, tx.amount, tx.currency, tx.merchant, tx.description)
+        return table
+
+    @classmethod
+    def from_columns(
+        cls,
+        date: List[str],
+        amount: List[float],
+        currency: Any,
+        merchants: List[str],
+        merchant_codes: List[int],
+        description: Optional[List[str]] = None,
+    ) -> "TransactionTable":
+        """
+        Builds a table from parallel column lists (the columnar wire format):
+        `merchant_codes` index into `merchants`, `currency` is one string for
+        every row or a list. Columns are converted in bulk; only distinct
+        strings are looked at one by one. Lengths and codes must already be
+        validated.
+        """
+        table = cls()
+        n = len(amount)
+        table.amounts = array("d", amount)
+
+        ordinals = table._ordinals
+        for value in set(date):
+            ordinals[value] = _date_to_ordinal(value)
+        table.dates = array("i", map(ordinals.__getitem__, date))
+        for i, value in enumerate(date):
+            if value and not ordinals[value]:
+                table._raw_dates[i] = value
+
+        remap = [table._merchants.code(m or "") for m in merchants]
+        if remap == list(range(len(merchants))):
+            table.merchant_codes = array("i", merchant_codes)
+        else:
+            table.merchant_codes = array("i", map(remap.__getitem__, merchant_codes))
+
+        if isinstance(currency, str):
+            table.currency_codes = array("i", [table._currencies.code(currency)]) * n
+        else:
+            table.currency_codes = array("i", map(table._currencies.code, currency))
+
+        table.description_codes = (
+            array("i", map(table._descriptions.code, description))
+            if description is not None
+            else array("i", [table._descriptions.code("")]) * n
+        )
+        table.category_codes = array("i", [NO_CATEGORY]) * n
+        return table
+
+    # ---- column access ------------------------------------------------
+
+    def date_str(self, i: int) -> str:
+        ordinal = self.dates[i]
+        if ordinal:
+            return _date.fromordinal(ordinal).isoformat()
+        return self._raw_dates.get(i, "")
+
+    def category(self, i: int) -> Optional[str]:
+        code = self.category_codes[i]
+        return None if code == NO_CATEGORY else self._categories.values[code]
+
+    def set_category(self, i: int, category: Optional[str]) -> None:
+        self.category_codes[i] = (
+            NO_CATEGORY if category is None else self._categories.code(category)
+        )
+
+    def nbytes(self) -> int:
+        """
+        Approximate size of the column buffers (excluding the string dictionaries).
+        """
+        columns = (
+            self.amounts,
+            self.dates,
+            self.currency_codes,
+            self.merchant_codes,
+            self.description_codes,
+            self.category_codes,
+        )
+        return sum(col.itemsize * len(col) for col in columns)
+
+    # ---- dict-view adapter --------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __getitem__(self, i: int) -> "TransactionRow":
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("transaction index out of range")
+        return TransactionRow(self, i)
+
+    def __iter__(self) -> Iterator["TransactionRow"]:
+        for i in range(len(self)):
+            yield TransactionRow(self, i)
+
+    def rows(self) -> List["TransactionRow"]:
+        return list(self)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [row.to_dict() for row in self]
+
+
+class TransactionRow(MutableMapping):
+    """
+    Dict-like view of one table row. Only "category" is writable; it is stored
+    back into the table so categorize_transactions works on tables directly.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: TransactionTable, index: int) -> None:
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, key: str) -> Any:
+        t, i = self.table, self.index
+        if key == "amount":
+            return t.amounts[i]
+        if key == "merchant":
+            return t.merchants[t.merchant_codes[i]]
+        if key == "category":
+            category = t.category(i)
+            if category is None:
+                raise KeyError(key)
+            return category
+        if key == "date":
+            return t.date_str(i)
+        if key == "description":
+            return t.descriptions[t.description_codes[i]]
+        if key == "currency":
+            return t.currencies[t.currency_codes[i]]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key != "category":
+            raise TypeError(f"TransactionRow field {key!r} is read-only")
+        self.table.set_category(self.index, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key != "category":
+            raise TypeError(f"TransactionRow field {key!r} is read-only")
+        self.table.set_category(self.index, None)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in _FIELDS:
+            if key != "category" or self.table.category_codes[self.index] != NO_CATEGORY:
+                yield key
+
+    def __len__(self) -> int:
+        return len(_FIELDS) - (self.table.category_codes[self.index] == NO_CATEGORY)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self}
+
+    def __repr__(self) -> str:
+        return f"TransactionRow({self.to_dict()!r})"
@@ -0,0 +1,222 @@
+"""
+Cache for agent chat answers.
+
+Users keep asking the same few questions against a summary that has not
+changed, and answers are generated with temperature 0, so an answer can be
+reused until the data, the question, the goal, the model or the prompt
+changes. Entries expire after RESPONSE_CACHE_TTL_SECONDS and at most
+RESPONSE_CACHE_SIZE are kept (0 disables the cache).
+
+Identical requests that arrive while the first one is still waiting on the
+LLM do not start calls of their own: they wait for that answer (single
+flight). Only real LLM answers are stored; fallbacks are not.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.cache import LRUCache
+from app.config import env_float, env_int
+from app.llm_clients import LLM_TIMEOUT_SECONDS
+from app.llm_guard import remaining_budget
+from app.metrics import count
+
+RESPONSE_CACHE_SIZE = env_int("RESPONSE_CACHE_SIZE", 256)
+RESPONSE_CACHE_TTL_SECONDS = env_float("RESPONSE_CACHE_TTL_SECONDS", 900)
+
+# How the last lookup in the current context was served: "hit", "miss",
+# "coalesced" (waited for an identical in-flight call) or None (not cached).
+_OUTCOME: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("response_cache_outcome", default=None)
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.text: Optional[str] = None
+
+
+def _wait_seconds() -> float:
+    remaining = remaining_budget()
+    return LLM_TIMEOUT_SECONDS if remaining is None else max(0.0, remaining)
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL + LRU map from a request key to answer text, with
+    single-flight coalescing for both threads and event-loop tasks.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS) -> None:
+        self.enabled = maxsize > 0
+        self.ttl_seconds = ttl_seconds if ttl_seconds > 0 else None
+        self._entries = LRUCache(maxsize=max(1, maxsize))
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._async_flights: Dict[Tuple[Any, Hashable], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.stores = 0
+
+    def _fresh(self, key: Hashable) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        text, stored_at = entry
+        if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+            self._entries.pop(key)
+            self.expired += 1
+            return None
+        return text
+
+    def lookup(self, key: Optional[Hashable]) -> Optional[str]:
+        """
+        Cached answer for key, or None. A None key (caching not applicable)
+        is never a hit.
+        """
+        if key is None or not self.enabled:
+            _OUTCOME.set(None)
+            return None
+        text = self._fresh(key)
+        with self._lock:
+            if text is not None:
+                self.hits += 1
+        if text is not None:
+            count("cache_lookups", cache="response", result="hit")
+        _OUTCOME.set("hit" if text is not None else "miss")
+        return text
+
+    def store(self, key: Hashable, text: Optional[str]) -> None:
+        if not text or not self.enabled:
+            return
+        self._entries.put(key, (text, time.monotonic()))
+        with self._lock:
+            self.stores += 1
+
+    def _count_miss(self, leader: bool) -> None:
+        with self._lock:
+            if leader:
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        outcome = "miss" if leader else "coalesced"
+        count("cache_lookups", cache="response", result=outcome)
+        _OUTCOME.set(outcome)
+
+    def get_or_compute(self, key: Optional[Hashable], compute: Callable[[], Optional[str]]) -> Optional[str]:
+        """
+        Cached answer, or compute() run once across threads for the same key.
+        compute() returns None when it could not produce an answer.
+        """
+        text = self.lookup(key)
+        if text is not None:
+            return text
+        if key is None or not self.enabled:
+            return compute()
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        self._count_miss(leader)
+
+        if not leader:
+            flight.done.wait(_wait_seconds())
+            return flight.text
+
+        try:
+            flight.text = compute()
+            self.store(key, flight.text)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.text
+
+    def begin_async(self, key: Hashable) -> Tuple[asyncio.Future, bool]:
+        """
+        Joins the in-flight call for key on the running loop. Returns
+        (future, is_leader); the leader must call finish_async().
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._async_flights.get((loop, key))
+            leader = future is None
+            if leader:
+                future = self._async_flights[(loop, key)] = loop.create_future()
+        self._count_miss(leader)
+        return future, leader
+
+    def finish_async(self, key: Hashable, future: asyncio.Future, text: Optional[str]) -> None:
+        self.store(key, text)
+        with self._lock:
+            self._async_flights.pop((asyncio.get_running_loop(), key), None)
+        if not future.done():
+            future.set_result(text)
+
+    async def follow_async(self, future: asyncio.Future) -> Optional[str]:
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=_wait_seconds())
+        except asyncio.TimeoutError:
+            return None
+
+    async def get_or_compute_async(
+        self,
+        key: Optional[Hashable],
+        compute: Callable[[], Awaitable[Optional[str]]],
+    ) -> Optional[str]:
+        text = self.lookup(key)
+        if text is not None:
+            return text
+        if key is None or not self.enabled:
+            return await compute()
+
+        future, leader = self.begin_async(key)
+        if not leader:
+            return await self.follow_async(future)
+
+        text = None
+        try:
+            text = await compute()
+        finally:
+            self.finish_async(key, future, text)
+        return text
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries.stats()
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "size": entries["size"] if self.enabled else 0,
+                "maxsize": entries["maxsize"] if self.enabled else 0,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "expired": self.expired,
+                "evictions": entries["evictions"],
+                "in_flight": len(self._flights) + len(self._async_flights),
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "llm_calls_saved_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            }
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def response_cache_outcome() -> Optional[str]:
+    """
+    How the last answer in the current context was served (see _OUTCOME).
+    """
+    return _OUTCOME.get()
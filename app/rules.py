@@ -1,5 +1,8 @@
 import re
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.config import env_int
 
 # Fixed category list (use these exact strings everywhere)
 CATEGORIES = [
@@ -18,7 +21,9 @@ CATEGORIES = [
 
 # Compiled regex patterns -> category
 # Order matters: first match wins.
-_RULES = [
+# Kept as a tuple so it can only change via set_rules() (or rebinding), which
+# is what invalidates the compiled matcher and the lookup caches below.
+_RULES = (
     # Income
     (re.compile(r"\bSALARY\b|\bPAYROLL\b", re.IGNORECASE), "income"),
 
@@ -74,10 +79,166 @@ _RULES = [
         r"\bAPPLE\b|\bAPP\s*STORE\b|\bITUNES\b",
         re.IGNORECASE
     ), "digital_services"),
-]
+)
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_SUFFIX_NOISE_RE = re.compile(
+    r"\b(LLC|L\.L\.C|LTD|FZCO|FZ-LLC|FZE|PJSC|CO\.|COMPANY)\b",
+    re.IGNORECASE,
+)
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+# Splits text into word runs and punctuation runs; whitespace is dropped, so two
+# adjacent word parts were separated by whitespace only (what \s* allows).
+_PARTS_RE = re.compile(r"\w+|[^\w\s]+")
+# One rule alternative of the plain keyword form: \bWORD(\s*WORD)*\b
+_KEYWORD_ALT_RE = re.compile(r"^\\b([A-Za-z0-9]+(?:\\s\*[A-Za-z0-9]+)*)\\b$")
+
+
+class _RuleMatcher:
+    """
+    _RULES compiled into one keyword automaton over uppercased tokens.
+
+    Each rule alternative of the form \bWORD\b or \bWORD\s*WORD...\b becomes a
+    token (or token phrase) entry pointing at the rule's priority. A text is
+    tokenized once and every token is looked up in a dict; the lowest rule
+    index seen wins, which is exactly the first-match-wins order of the rule
+    list. Alternatives that are not plain keywords (e.g. DISNEY\+) stay as a
+    small residual regex per rule, only consulted when they could still beat
+    the best keyword hit.
+    """
+
+    def __init__(self, rules) -> None:
+        self.rules = rules
+        self.categories = [category for _, category in rules]
+        self.words: dict = {}
+        self.phrases: dict = {}
+        self.residual: list = []
+
+        for index, (pattern, _) in enumerate(rules):
+            keywords, leftovers = self._split_pattern(pattern)
+            for words in keywords:
+                self._add_keyword(words, index)
+            if leftovers:
+                flags = pattern.flags & ~re.UNICODE
+                self.residual.append((index, re.compile("|".join(leftovers), flags)))
+
+    @staticmethod
+    def _split_pattern(pattern: "re.Pattern"):
+        alternatives = pattern.pattern.split("|")
+        if not pattern.flags & re.IGNORECASE or any("(" in alt for alt in alternatives):
+            return [], [pattern.pattern]
+
+        keywords, leftovers = [], []
+        for alt in alternatives:
+            m = _KEYWORD_ALT_RE.match(alt.strip())
+            words = tuple(w.upper() for w in m.group(1).split("\\s*")) if m else ()
+            if 1 <= len(words) <= 2:
+                keywords.append(words)
+            else:
+                leftovers.append(alt)
+        return keywords, leftovers
+
+    def _add_keyword(self, words: tuple, index: int) -> None:
+        # \s* also matches zero spaces, i.e. the words glued into one token.
+        joined = "".join(words)
+        if self.words.get(joined, index) >= index:
+            self.words[joined] = index
+        if len(words) > 1:
+            self.phrases.setdefault(words[0], []).append((words[1:], index))
+
+    def match(self, text: str) -> Optional[str]:
+        best = len(self.categories)
+        words = self.words
+        phrases = self.phrases
+
+        parts = _PARTS_RE.findall(text.upper())
+        for k, part in enumerate(parts):
+            index = words.get(part)
+            if index is not None and index < best:
+                best = index
+                if best == 0:
+                    break
+            tails = phrases.get(part)
+            if tails:
+                for tail, index in tails:
+                    if index < best and tuple(parts[k + 1:k + 1 + len(tail)]) == tail:
+                        best = index
+
+        for index, pattern in self.residual:
+            if index >= best:
+                break
+            if pattern.search(text):
+                best = index
+                break
+
+        return self.categories[best] if best < len(self.categories) else None
+
+
+_MATCHER: Optional[_RuleMatcher] = None
+
+
+def _matcher() -> _RuleMatcher:
+    global _MATCHER
+    if _MATCHER is None or _MATCHER.rules is not _RULES:
+        _MATCHER = _RuleMatcher(_RULES)
+    return _MATCHER
+
+
+# =========================
+# Memoized lookups
+# =========================
+# Real statements repeat a few hundred merchants thousands of times, so both
+# normalization and (merchant, description) -> category are cached.
+RULE_CACHE_SIZE = env_int("RULE_CACHE_SIZE", 65536)
+
+# _RULES object the category cache was filled with.
+_CACHED_RULES = _RULES
+
+
+def set_rules(rules: Iterable[Tuple["re.Pattern", str]]) -> None:
+    """
+    Replaces the rule table and drops everything derived from the old one.
+    """
+    global _RULES
+    _RULES = tuple(rules)
+    clear_rule_caches()
+
+
+def clear_rule_caches() -> None:
+    global _CACHED_RULES
+    _normalize_merchant_cached.cache_clear()
+    _categorize_cached.cache_clear()
+    _CACHED_RULES = _RULES
+
+
+def rule_cache_stats() -> Dict[str, Dict[str, int]]:
+    stats = {}
+    for name, fn in (("normalize", _normalize_merchant_cached), ("categorize", _categorize_cached)):
+        info = fn.cache_info()
+        stats[name] = {
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hits": info.hits,
+            "misses": info.misses,
+        }
+    return stats
 
 
 def normalize_merchant(raw: str) -> str:
+    """
+    Normalize merchant string to improve matching (memoized).
+    """
+    return _normalize_merchant_cached(raw or "")
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def _normalize_merchant_cached(raw: str) -> str:
+    return _normalize_merchant(raw)
+
+
+def _normalize_merchant(raw: str) -> str:
     """
     Normalize merchant string to improve matching.
     Keeps it simple for MVP.
@@ -88,37 +249,48 @@ def normalize_merchant(raw: str) -> str:
     s = raw.strip()
 
     # Collapse whitespace
-    s = re.sub(r"\s+", " ", s)
+    s = _WHITESPACE_RE.sub(" ", s)
 
     # Remove common suffix noise (optional)
-    s = re.sub(
-        r"\b(LLC|L\.L\.C|LTD|FZCO|FZ-LLC|FZE|PJSC|CO\.|COMPANY)\b",
-        "",
-        s,
-        flags=re.IGNORECASE,
-    )
+    s = _SUFFIX_NOISE_RE.sub("", s)
 
     # Remove extra punctuation except spaces
-    s = re.sub(r"[^\w\s]", " ", s)
+    s = _PUNCTUATION_RE.sub(" ", s)
 
     # Collapse again
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _WHITESPACE_RE.sub(" ", s).strip()
 
     return s
 
 
-def categorize_by_rules(merchant: str, description: str = "") -> Optional[str]:
-    """
-    Returns a category string if matched, else None.
-    """
+def _rules_text(merchant: str, description: str) -> str:
     m = normalize_merchant(merchant)
     d = (description or "").strip()
 
     # For matching we combine merchant + description
-    text = f"{m} {d}".strip()
+    return f"{m} {d}".strip()
 
+
+def _match_sequential(text: str) -> Optional[str]:
+    """
+    Reference implementation: try each rule regex in order.
+    """
     for pattern, category in _RULES:
         if pattern.search(text):
             return category
 
     return None
+
+
+def categorize_by_rules(merchant: str, description: str = "") -> Optional[str]:
+    """
+    Returns a category string if matched, else None.
+    """
+    if _RULES is not _CACHED_RULES:
+        clear_rule_caches()
+    return _categorize_cached(merchant or "", description or "")
+
+
+@lru_cache(maxsize=RULE_CACHE_SIZE)
+def _categorize_cached(merchant: str, description: str) -> Optional[str]:
+    return _matcher().match(_rules_text(merchant, description))
@@ -2,15 +2,88 @@ from __future__ import annotations
 
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+from app.models import TransactionTable
+
+
+class TransactionColumns(BaseModel):
+    """
+    Columnar transactions payload, sent as `context.columns` instead of
+    `context.transactions`: one array per field, row i made of the i-th
+    entries. Merchants are dictionary-encoded: `merchant` holds indexes into
+    `merchants`. `currency` is a single value for every row or an array;
+    `description` may be omitted.
+    """
+
+    date: list[str]
+    amount: list[float]
+    merchants: list[str]
+    merchant: list[int]
+    currency: str | list[str] = "AED"
+    description: list[str] | None = None
+
+    @model_validator(mode="after")
+    def _check_columns(self) -> "TransactionColumns":
+        n = len(self.amount)
+        lengths = {"date": len(self.date), "merchant": len(self.merchant)}
+        if isinstance(self.currency, list):
+            lengths["currency"] = len(self.currency)
+        if self.description is not None:
+            lengths["description"] = len(self.description)
+        uneven = {name: length for name, length in lengths.items() if length != n}
+        if uneven:
+            raise ValueError(f"column lengths differ from amount ({n}): {uneven}")
+        if self.merchant and (min(self.merchant) < 0 or max(self.merchant) >= len(self.merchants)):
+            raise ValueError(f"merchant codes must be in [0, {len(self.merchants)})")
+        return self
+
+    def to_table(self) -> TransactionTable:
+        return TransactionTable.from_columns(
+            date=self.date,
+            amount=self.amount,
+            currency=self.currency,
+            merchants=self.merchants,
+            merchant_codes=self.merchant,
+            description=self.description,
+        )
 
 
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1, description="User message to the finance assistant")
     user_id: str | None = Field(default=None, description="Optional user identifier")
     context: dict[str, Any] | None = Field(default=None, description="Optional summary or transactions payload")
+    columns: TransactionColumns | None = Field(default=None, exclude=True)
+    timings: bool = Field(default=False, description="Include a per-stage timing breakdown in meta")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _extract_columns(cls, data: Any) -> Any:
+        # context.columns is validated as TransactionColumns rather than as free-form JSON.
+        if isinstance(data, dict) and isinstance(data.get("context"), dict) and "columns" in data["context"]:
+            context = dict(data["context"])
+            data = {**data, "columns": context.pop("columns"), "context": context}
+        return data
+
+    def chat_context(self) -> dict[str, Any] | None:
+        """
+        Context for the agent service; a columnar payload arrives as a
+        TransactionTable under "table".
+        """
+        if self.columns is None:
+            return self.context
+        return {**(self.context or {}), "table": self.columns.to_table()}
 
 
 class ChatResponse(BaseModel):
     reply: str
     meta: dict[str, Any]
+
+
+class UploadResponse(BaseModel):
+    user_id: str
+    tx_count: int
+    total_spent_aed: float
+    stats: dict[str, int] = Field(description="Categorization coverage counters")
+    bytes: int
+    seconds: float
@@ -1,39 +1,53 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import re
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
-
-# Ensure repository root is importable when backend is launched from /backend.
-REPO_ROOT = Path(__file__).resolve().parents[3]
-
-import sys
-
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
-
-from app.agent_chat import answer_user_question
+from typing import Any, AsyncIterator
+
+from app.agent_chat import (
+    answer_user_question,
+    answer_user_question_async,
+    last_route,
+    stream_truncated,
+    stream_user_question_async,
+)
+from app.cache import LRUCache
+from app.context_builder import AgentContext, prepare_agent_context
 from app.analytics import build_summary
-from app.categorize import categorize_transactions
-from app.ingest import load_transactions_as_dicts
+from app.categorize import categorize_transactions, categorize_transactions_async
+from app.config import env_int
+from app.ingest import load_transactions_table
+from app.models import TransactionTable
+from app.llm_cache import get_llm_cache
+from app.llm_guard import fallback_count, llm_deadline
+from app.local_classifier import get_local_classifier
+from app.metrics import RequestMetrics, count, request_metrics, span
+from app.response_cache import RESPONSE_CACHE, response_cache_outcome
+from backend.app.core.conversation_store import ConversationState, create_conversation_store
 
 
+REPO_ROOT = Path(__file__).resolve().parents[3]
 SAMPLE_DATA_PATH = REPO_ROOT / "data" / "sample_transactions.csv"
-DEFAULT_GOAL_AED = 300
+SUMMARY_CACHE_SIZE = env_int("SUMMARY_CACHE_SIZE", 64)
 
+# (summary, agent context) pairs keyed by source identity, so repeated chat
+# turns over the same data skip ingest, categorization (including LLM calls),
+# analytics and prompt context encoding.
+SUMMARY_CACHE = LRUCache(maxsize=SUMMARY_CACHE_SIZE)
 
-@dataclass
-class ConversationState:
-    mode: str = "idle"
-    goal_amount: int = DEFAULT_GOAL_AED
-    questions_total: int = 0
-    questions_asked: int = 0
-    answers: dict[str, str] = field(default_factory=dict)
-    last_summary_sent: str | None = None
+USER_SUMMARY_CACHE_SIZE = env_int("USER_SUMMARY_CACHE_SIZE", 1000)
 
+# Agent contexts of uploaded summaries, as (summary, agent context) pairs keyed
+# by user id. The summaries themselves live in the user's ConversationState.
+USER_SUMMARIES = LRUCache(maxsize=USER_SUMMARY_CACHE_SIZE)
 
-CONVERSATION_STORE: dict[str, ConversationState] = {}
+
+# Bounded per-session state; backend chosen by CONVERSATION_STORE (memory|sqlite).
+CONVERSATION_STORE = create_conversation_store()
 
 GREETING_WORDS = {"hi", "hello", "hey", "yo", "sup", "hola"}
 FINANCE_KEYWORDS = ("save", "aed", "reduce spending", "budget")
@@ -46,20 +60,209 @@ DEMO_QUESTIONS = [
 ]
 
 
-def build_summary_for_chat(context: dict[str, Any] | None = None) -> tuple[dict[str, Any], str]:
+def warm_caches() -> None:
+    """
+    Loads persistent caches into memory; called once at API startup.
+    """
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        llm_cache.warm()
+    get_local_classifier()
+
+
+def _csv_cache_key(path: Path) -> tuple:
+    stat = path.stat()
+    return ("csv", str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+def _transactions_cache_key(txs: list[Any]) -> tuple:
+    payload = json.dumps(txs, sort_keys=True, ensure_ascii=False, default=str)
+    return ("transactions", hashlib.sha256(payload.encode("utf-8")).hexdigest())
+
+
+def _table_cache_key(table: TransactionTable) -> tuple:
+    digest = hashlib.sha256()
+    for column in (table.amounts, table.dates, table.currency_codes, table.merchant_codes, table.description_codes):
+        digest.update(column.tobytes())
+    for values in (table.currencies, table.merchants, table.descriptions):
+        digest.update(json.dumps(values, ensure_ascii=False).encode("utf-8"))
+    digest.update(json.dumps(sorted(table._raw_dates.items())).encode("utf-8"))
+    return ("table", digest.hexdigest())
+
+
+def _summarize_table(table: TransactionTable) -> dict[str, Any]:
+    table, _ = categorize_transactions(table, use_llm=True)
+    return build_summary(table)
+
+
+def _summarize_transactions(txs: list[Any]) -> dict[str, Any]:
+    # Copy rows so categorization never mutates the caller's payload.
+    rows = [dict(tx) for tx in txs if isinstance(tx, dict)]
+    rows, _ = categorize_transactions(rows, use_llm=True)
+    return build_summary(rows)
+
+
+def _summarize_csv(path: Path) -> dict[str, Any]:
+    table = load_transactions_table(str(path))
+    table, _ = categorize_transactions(table, use_llm=True)
+    return build_summary(table)
+
+
+def _cached_summary(key: tuple, compute) -> tuple[dict[str, Any], AgentContext]:
+    cached = SUMMARY_CACHE.get(key)
+    count("cache_lookups", cache="summary", result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
+
+    # A summary built while LLM categorization was skipped or failed is served
+    # but not cached, so a later request can fill in the real categories.
+    fallbacks = fallback_count()
+    summary = compute()
+    cached = (summary, prepare_agent_context(summary))
+    if fallback_count() == fallbacks:
+        SUMMARY_CACHE.put(key, cached)
+    return cached
+
+
+def store_user_summary(user_id: str, summary: dict[str, Any]) -> None:
+    """
+    Makes an uploaded summary the chat data of `user_id`. Blocking (store I/O).
+    """
+    state = CONVERSATION_STORE.get_or_create(user_id)
+    state.uploaded_summary = summary
+    CONVERSATION_STORE.save(user_id, state)
+    USER_SUMMARIES.put(user_id, (summary, prepare_agent_context(summary)))
+
+
+def _uploaded_summary(user_id: str | None) -> tuple[dict[str, Any], AgentContext] | None:
+    """
+    The user's uploaded summary and its agent context, if they uploaded one.
+    Anonymous turns never see uploads. Blocking (store I/O).
+    """
+    if not user_id:
+        return None
+    state = CONVERSATION_STORE.get(user_id)
+    summary = state.uploaded_summary if state is not None else None
+    if summary is None:
+        USER_SUMMARIES.pop(user_id)
+        return None
+    cached = USER_SUMMARIES.get(user_id)
+    if cached is None or cached[0] is not summary:
+        cached = (summary, prepare_agent_context(summary))
+        USER_SUMMARIES.put(user_id, cached)
+    return cached
+
+
+def build_summary_for_chat(
+    context: dict[str, Any] | None = None,
+    user_id: str | None = None,
+) -> tuple[dict[str, Any], AgentContext | None, str]:
+    """
+    Returns (summary, agent context, source). Data in the request wins, then
+    the user's uploaded CSV, then the sample CSV. The agent context is None
+    for a caller-provided summary; the answer functions then build it on demand.
+    """
     context = context or {}
 
     if isinstance(context.get("summary"), dict):
-        return context["summary"], "provided_summary"
+        return context["summary"], None, "provided_summary"
+
+    table = context.get("table")
+    if isinstance(table, TransactionTable):
+        summary, agent_context = _cached_summary(
+            _table_cache_key(table),
+            lambda: _summarize_table(table),
+        )
+        return summary, agent_context, "provided_columns"
 
     txs = context.get("transactions")
     if isinstance(txs, list):
-        txs, _ = categorize_transactions(txs, use_llm=True)
-        return build_summary(txs), "provided_transactions"
+        summary, agent_context = _cached_summary(
+            _transactions_cache_key(txs),
+            lambda: _summarize_transactions(txs),
+        )
+        return summary, agent_context, "provided_transactions"
+
+    uploaded = _uploaded_summary(user_id)
+    if uploaded is not None:
+        return uploaded[0], uploaded[1], "uploaded_csv"
+
+    summary, agent_context = _cached_summary(
+        _csv_cache_key(SAMPLE_DATA_PATH),
+        lambda: _summarize_csv(SAMPLE_DATA_PATH),
+    )
+    return summary, agent_context, "sample_csv"
+
+
+async def _summarize_table_async(table: TransactionTable) -> dict[str, Any]:
+    table, _ = await categorize_transactions_async(table, use_llm=True)
+    return await asyncio.to_thread(build_summary, table)
+
+
+async def _summarize_transactions_async(txs: list[Any]) -> dict[str, Any]:
+    rows = [dict(tx) for tx in txs if isinstance(tx, dict)]
+    rows, _ = await categorize_transactions_async(rows, use_llm=True)
+    return await asyncio.to_thread(build_summary, rows)
+
+
+async def _summarize_csv_async(path: Path) -> dict[str, Any]:
+    table = await asyncio.to_thread(load_transactions_table, str(path))
+    table, _ = await categorize_transactions_async(table, use_llm=True)
+    return await asyncio.to_thread(build_summary, table)
+
+
+async def _cached_summary_async(key: tuple, compute) -> tuple[dict[str, Any], AgentContext]:
+    cached = SUMMARY_CACHE.get(key)
+    count("cache_lookups", cache="summary", result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached
 
-    txs = load_transactions_as_dicts(str(SAMPLE_DATA_PATH))
-    txs, _ = categorize_transactions(txs, use_llm=True)
-    return build_summary(txs), "sample_csv"
+    fallbacks = fallback_count()
+    summary = await compute()
+    cached = (summary, prepare_agent_context(summary))
+    if fallback_count() == fallbacks:
+        SUMMARY_CACHE.put(key, cached)
+    return cached
+
+
+async def build_summary_for_chat_async(
+    context: dict[str, Any] | None = None,
+    user_id: str | None = None,
+) -> tuple[dict[str, Any], AgentContext | None, str]:
+    """
+    build_summary_for_chat for the event loop: file I/O and analytics run in
+    worker threads, LLM categorization on the async client.
+    """
+    context = context or {}
+
+    if isinstance(context.get("summary"), dict):
+        return context["summary"], None, "provided_summary"
+
+    table = context.get("table")
+    if isinstance(table, TransactionTable):
+        summary, agent_context = await _cached_summary_async(
+            await asyncio.to_thread(_table_cache_key, table),
+            lambda: _summarize_table_async(table),
+        )
+        return summary, agent_context, "provided_columns"
+
+    txs = context.get("transactions")
+    if isinstance(txs, list):
+        summary, agent_context = await _cached_summary_async(
+            await asyncio.to_thread(_transactions_cache_key, txs),
+            lambda: _summarize_transactions_async(txs),
+        )
+        return summary, agent_context, "provided_transactions"
+
+    uploaded = await asyncio.to_thread(_uploaded_summary, user_id)
+    if uploaded is not None:
+        return uploaded[0], uploaded[1], "uploaded_csv"
+
+    summary, agent_context = await _cached_summary_async(
+        _csv_cache_key(SAMPLE_DATA_PATH),
+        lambda: _summarize_csv_async(SAMPLE_DATA_PATH),
+    )
+    return summary, agent_context, "sample_csv"
 
 
 def _normalize(text: str) -> str:
@@ -100,11 +303,16 @@ def _next_question(state: ConversationState) -> str:
 
 
 def _summary_text(summary: dict[str, Any]) -> str:
-    top = (summary.get("top_categories") or [{}])[0]
+    ranked = summary.get("top_categories_aed")
+    if ranked:
+        category, total = ranked[0][0], ranked[0][1]
+    else:
+        top = (summary.get("top_categories") or [{}])[0]
+        category, total = top.get("category", "n/a"), top.get("total_aed", 0)
     return (
         "I checked your latest spending snapshot. "
         f"Spent: {summary.get('total_spent_aed', 0):.2f} AED. "
-        f"Top category: {top.get('category', 'n/a')} ({top.get('total_aed', 0):.2f} AED)."
+        f"Top category: {category} ({total:.2f} AED)."
     )
 
 
@@ -137,12 +345,179 @@ def _advice_from_answers(state: ConversationState) -> str:
     )
 
 
-def chat_with_agent(message: str, user_id: str | None = None, context: dict[str, Any] | None = None) -> dict[str, Any]:
+@dataclass
+class _PendingAnswer:
+    """
+    Placeholder reply for turns that need the LLM answer; resolved by the
+    sync or async entry point.
+    """
+
+    summary: dict[str, Any]
+    question: str
+    goal_aed: int
+    prefix: str
+
+
+def _finish_turn(result: dict[str, Any], reply: str) -> dict[str, Any]:
+    pending = result["reply"]
+    result["reply"] = f"{pending.prefix}{reply}" if pending.prefix else reply
+    if stream_truncated():
+        result["meta"]["truncated"] = True
+    route = last_route()
+    if route is not None:
+        result["meta"]["route"] = {"intent": route.intent, "confidence": route.confidence, "local": route.local}
+        if route.local:
+            return result
+    outcome = response_cache_outcome()
+    if outcome is not None:
+        stats = RESPONSE_CACHE.stats()
+        result["meta"]["response_cache"] = {
+            "outcome": outcome,
+            "hit_rate": stats["hit_rate"],
+            "llm_calls_saved_rate": stats["llm_calls_saved_rate"],
+        }
+    return result
+
+
+def _report_fallbacks(result: dict[str, Any], fallbacks: int) -> dict[str, Any]:
+    if fallbacks:
+        result["meta"]["llm_fallbacks"] = fallbacks
+    return result
+
+
+def _report_timings(result: dict[str, Any], metrics: RequestMetrics, timings: bool) -> dict[str, Any]:
+    if timings:
+        result["meta"]["timings"] = metrics.breakdown()
+    return result
+
+
+def chat_with_agent(
+    message: str,
+    user_id: str | None = None,
+    context: dict[str, Any] | None = None,
+    timings: bool = False,
+) -> dict[str, Any]:
+    """
+    Runs one chat turn under the LLM request budget (LLM_REQUEST_BUDGET_SECONDS).
+    With timings, meta["timings"] holds the turn's per-stage times and
+    counters (app/metrics.py).
+    """
+    with llm_deadline(), request_metrics() as metrics, span("chat"):
+        with span("summary"):
+            summary, agent_context, source = build_summary_for_chat(context, user_id)
+        result = _chat_turn(message, user_id, context, summary, source)
+        pending = result["reply"]
+        if isinstance(pending, _PendingAnswer):
+            with span("answer"):
+                reply = answer_user_question(pending.summary, pending.question, pending.goal_aed, agent_context)
+            _finish_turn(result, reply)
+        fallbacks = fallback_count()
+    return _report_timings(_report_fallbacks(result, fallbacks), metrics, timings)
+
+
+async def chat_with_agent_async(
+    message: str,
+    user_id: str | None = None,
+    context: dict[str, Any] | None = None,
+    timings: bool = False,
+) -> dict[str, Any]:
+    """
+    chat_with_agent for the event loop: never blocks it on file I/O,
+    categorization or LLM calls.
+    """
+    with llm_deadline(), request_metrics() as metrics, span("chat"):
+        with span("summary"):
+            summary, agent_context, source = await build_summary_for_chat_async(context, user_id)
+        result = await asyncio.to_thread(_chat_turn, message, user_id, context, summary, source)
+        pending = result["reply"]
+        if isinstance(pending, _PendingAnswer):
+            with span("answer"):
+                reply = await answer_user_question_async(
+                    pending.summary, pending.question, pending.goal_aed, agent_context
+                )
+            _finish_turn(result, reply)
+        fallbacks = fallback_count()
+    return _report_timings(_report_fallbacks(result, fallbacks), metrics, timings)
+
+
+async def chat_with_agent_stream(
+    message: str,
+    user_id: str | None = None,
+    context: dict[str, Any] | None = None,
+    timings: bool = False,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Streaming chat turn. Yields (event, data) pairs:
+      ("summary", {"text"})  spending snapshot, sent before an LLM answer starts
+      ("delta", {"text"})    reply text; a fallback or scripted reply is one delta
+      ("done", {"reply", "meta"})  the full result, as chat_with_agent returns it;
+                             meta["truncated"] when the LLM stream broke off
+      ("error", {"error"})   the turn failed
+    """
+    queue: asyncio.Queue[tuple[str, dict[str, Any]] | None] = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            with llm_deadline(), request_metrics() as metrics, span("chat"):
+                with span("summary"):
+                    summary, agent_context, source = await build_summary_for_chat_async(context, user_id)
+                # The conversation store may read from disk (CONVERSATION_STORE=sqlite).
+                result = await asyncio.to_thread(_chat_turn, message, user_id, context, summary, source)
+                pending = result["reply"]
+                if isinstance(pending, _PendingAnswer):
+                    await queue.put(("summary", {"text": _summary_text(summary)}))
+                    parts = []
+                    with span("answer"):
+                        async for delta in stream_user_question_async(
+                            pending.summary, pending.question, pending.goal_aed, agent_context
+                        ):
+                            parts.append(delta)
+                            await queue.put(("delta", {"text": delta}))
+                    _finish_turn(result, "".join(parts))
+                else:
+                    await queue.put(("delta", {"text": pending}))
+                fallbacks = fallback_count()
+            await queue.put(("done", _report_timings(_report_fallbacks(result, fallbacks), metrics, timings)))
+        except Exception as exc:
+            await queue.put(("error", {"error": str(exc)}))
+        finally:
+            await queue.put(None)
+
+    # The turn runs in its own task (and LLM budget context); a client that
+    # disconnects cancels it.
+    task = asyncio.create_task(produce())
+    try:
+        while (item := await queue.get()) is not None:
+            yield item
+    finally:
+        task.cancel()
+
+
+def _chat_turn(
+    message: str,
+    user_id: str | None,
+    context: dict[str, Any] | None,
+    summary: dict[str, Any],
+    source: str,
+) -> dict[str, Any]:
     session_key = user_id or "default"
-    state = CONVERSATION_STORE.setdefault(session_key, ConversationState())
+    state = CONVERSATION_STORE.get_or_create(session_key)
+    try:
+        return _advance_conversation(state, message, user_id, context, summary, source)
+    finally:
+        CONVERSATION_STORE.save(session_key, state)
+
+
+def _advance_conversation(
+    state: ConversationState,
+    message: str,
+    user_id: str | None,
+    context: dict[str, Any] | None,
+    summary: dict[str, Any],
+    source: str,
+) -> dict[str, Any]:
     text = message.strip()
 
-    summary, source = build_summary_for_chat(context)
     goal = context.get("goal_aed") if isinstance(context, dict) else None
     goal_aed = goal if isinstance(goal, int) else state.goal_amount
 
@@ -246,9 +621,8 @@ def chat_with_agent(message: str, user_id: str | None = None, context: dict[str,
         state.last_summary_sent = _summary_text(summary)
         summary_prefix = f"{state.last_summary_sent}\n\n"
 
-    reply = answer_user_question(summary=summary, question=message, goal_aed=goal_aed)
     return {
-        "reply": f"{summary_prefix}{reply}" if summary_prefix else reply,
+        "reply": _PendingAnswer(summary=summary, question=message, goal_aed=goal_aed, prefix=summary_prefix),
         "meta": {
             "user_id": user_id,
             "context_source": source,
@@ -0,0 +1,405 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.config import env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+DEFAULT_GOAL_AED = 300
+
+CONVERSATION_BACKEND = env_str("CONVERSATION_STORE", "memory").lower()
+CONVERSATION_DB_PATH = env_str("CONVERSATION_DB_PATH", str(REPO_ROOT / "data" / "conversations.sqlite3"))
+CONVERSATION_MAX_SESSIONS = env_int("CONVERSATION_MAX_SESSIONS", 10000)
+CONVERSATION_TTL_SECONDS = env_float("CONVERSATION_TTL_SECONDS", 7 * 86400)
+CONVERSATION_FLUSH_SECONDS = env_float("CONVERSATION_FLUSH_SECONDS", 0.5)
+
+
+@dataclass
+class ConversationState:
+    mode: str = "idle"
+    goal_amount: int = DEFAULT_GOAL_AED
+    questions_total: int = 0
+    questions_asked: int = 0
+    answers: dict[str, str] = field(default_factory=dict)
+    last_summary_sent: str | None = None
+    # Summary of the user's last /transactions/upload; kept here so every
+    # worker sharing the store answers from it.
+    uploaded_summary: dict[str, Any] | None = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "ConversationState":
+        data = json.loads(raw)
+        return cls(**{key: value for key, value in data.items() if key in cls.__dataclass_fields__})
+
+
+class ConversationStore(ABC):
+    """
+    Per-session chat state. get_or_create() hands out a state object that the
+    caller mutates in place and then passes back to save().
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> ConversationState | None: ...
+
+    @abstractmethod
+    def save(self, key: str, state: ConversationState) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    def stats(self) -> dict[str, Any]: ...
+
+    def get_or_create(self, key: str) -> ConversationState:
+        state = self.get(key)
+        if state is None:
+            state = ConversationState()
+            self.save(key, state)
+        return state
+
+    def flush(self) -> None:
+        """Persists pending writes (no-op for stores without write-behind)."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    LRU + TTL bounded store: at most `maxsize` sessions, each dropped after
+    `ttl_seconds` without activity. Lost on restart, private to the process.
+    """
+
+    def __init__(self, maxsize: int = CONVERSATION_MAX_SESSIONS, ttl_seconds: float | None = CONVERSATION_TTL_SECONDS) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self._data: OrderedDict[str, tuple[ConversationState, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> ConversationState | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl_seconds is not None and now - entry[1] > self.ttl_seconds:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def save(self, key: str, state: ConversationState) -> None:
+        with self._lock:
+            self._data[key] = (state, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    session_key TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# Writes a dirty session unless another worker wrote the row since this one
+# read it (version moved on). Expired rows count as absent. Returns the new
+# version, or no row on a conflict.
+_UPSERT = (
+    "INSERT INTO conversations (session_key, state, updated_at, version) VALUES (?, ?, ?, 1) "
+    "ON CONFLICT(session_key) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at, "
+    "version = conversations.version + 1 "
+    "WHERE conversations.version = ? OR conversations.updated_at < ? "
+    "RETURNING version"
+)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    SQLite-backed store that survives restarts and can be shared by several
+    uvicorn workers on one host.
+
+    save() only records the state as dirty; a background thread writes dirty
+    sessions in one transaction every `flush_interval` seconds (or as soon
+    as `batch_size` are pending). Other workers therefore see a change after
+    at most one flush interval.
+
+    Recently used sessions stay parsed in an in-memory LRU front, tagged with
+    the row version they were read or written at. get() revalidates a front
+    entry with one indexed read of that version and only re-parses the state
+    when another worker has written it since. A write based on an outdated
+    version is dropped rather than overwriting the newer row (counted in
+    stats() as a conflict), so of two concurrent turns the first flushed wins.
+    """
+
+    def __init__(
+        self,
+        path: str = CONVERSATION_DB_PATH,
+        ttl_seconds: float | None = CONVERSATION_TTL_SECONDS,
+        cache_size: int = CONVERSATION_MAX_SESSIONS,
+        flush_interval: float = CONVERSATION_FLUSH_SECONDS,
+        batch_size: int = 500,
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self.cache_size = max(1, cache_size)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # key -> (state, row version it is based on; 0 = no live row seen)
+        self._front: OrderedDict[str, tuple[ConversationState, int]] = OrderedDict()
+        self._dirty: dict[str, tuple[ConversationState, int]] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.db_reads = 0
+        self.conflicts = 0
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(conversations)")}
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE conversations ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        self.purge_expired()
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="conversation-flush", daemon=True)
+        self._flusher.start()
+        # Pending writes would otherwise be lost when the process exits without a shutdown event.
+        atexit.register(self.close)
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _remember(self, key: str, state: ConversationState, version: int) -> None:
+        self._front[key] = (state, version)
+        self._front.move_to_end(key)
+        while len(self._front) > self.cache_size:
+            self._front.popitem(last=False)
+
+    def get(self, key: str) -> ConversationState | None:
+        with self._lock:
+            pending = self._dirty.get(key)
+            if pending is not None:
+                # This worker's own unflushed write is the newest state it can see.
+                self._front.move_to_end(key)
+                self.cache_hits += 1
+                return pending[0]
+            cached = self._front.get(key)
+
+        with self._db_lock:
+            self.db_reads += 1
+            row = self._conn.execute(
+                "SELECT version, updated_at, CASE WHEN version = ? THEN NULL ELSE state END "
+                "FROM conversations WHERE session_key = ?",
+                (cached[1] if cached is not None else -1, key),
+            ).fetchone()
+
+        with self._lock:
+            if row is None or (self.ttl_seconds is not None and time.time() - row[1] > self.ttl_seconds):
+                self._front.pop(key, None)
+                self.cache_misses += 1
+                return None
+            if row[2] is None:
+                self._front.move_to_end(key)
+                self.cache_hits += 1
+                return cached[0]
+            state = ConversationState.from_json(row[2])
+            self._remember(key, state, row[0])
+            self.cache_misses += 1
+            return state
+
+    def save(self, key: str, state: ConversationState) -> None:
+        with self._lock:
+            if key in self._dirty:
+                base = self._dirty[key][1]
+            else:
+                cached = self._front.get(key)
+                base = cached[1] if cached is not None else 0
+            self._dirty[key] = (state, base)
+            self._remember(key, state, base)
+            pending = len(self._dirty)
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+
+        now = time.time()
+        expired_before = now - self.ttl_seconds if self.ttl_seconds is not None else float("-inf")
+        written: dict[str, tuple[ConversationState, int]] = {}
+        conflicts = []
+        with self._db_lock:
+            for key, (state, base) in dirty.items():
+                row = self._conn.execute(_UPSERT, (key, state.to_json(), now, base, expired_before)).fetchone()
+                if row is None:
+                    conflicts.append(key)
+                else:
+                    written[key] = (state, row[0])
+            self._conn.commit()
+            self.flushes += 1
+            self.rows_written += len(written)
+
+        if conflicts:
+            logger.warning(
+                "dropped %d conversation write(s) superseded by another worker: %s",
+                len(conflicts),
+                ", ".join(conflicts[:10]),
+            )
+        with self._lock:
+            self.conflicts += len(conflicts)
+            for key in conflicts:
+                # Reload the other worker's state on the next get().
+                if key not in self._dirty:
+                    self._front.pop(key, None)
+            for key, (state, version) in written.items():
+                if key in self._dirty:
+                    # Saved again meanwhile: that write now builds on this one.
+                    self._dirty[key] = (self._dirty[key][0], version)
+                    self._remember(key, self._dirty[key][0], version)
+                elif key in self._front:
+                    self._remember(key, state, version)
+
+    def purge_expired(self) -> int:
+        if self.ttl_seconds is None:
+            return 0
+        with self._db_lock:
+            count = self._conn.execute(
+                "DELETE FROM conversations WHERE updated_at < ?",
+                (time.time() - self.ttl_seconds,),
+            ).rowcount
+            self._conn.commit()
+            return count
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._front.pop(key, None)
+            self._dirty.pop(key, None)
+        with self._db_lock:
+            self._conn.execute("DELETE FROM conversations WHERE session_key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._front.clear()
+            self._dirty.clear()
+        with self._db_lock:
+            self._conn.execute("DELETE FROM conversations")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def close(self) -> None:
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+        atexit.unregister(self.close)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "cached_sessions": len(self._front),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "pending_writes": len(self._dirty),
+                "flushes": self.flushes,
+                "rows_written": self.rows_written,
+                "db_reads": self.db_reads,
+                "conflicts": self.conflicts,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+def create_conversation_store() -> ConversationStore:
+    """
+    Store selected by CONVERSATION_STORE: "memory" (default) or "sqlite".
+    """
+    if CONVERSATION_BACKEND == "sqlite":
+        return SQLiteConversationStore()
+    if CONVERSATION_BACKEND != "memory":
+        raise ValueError(f"Unknown CONVERSATION_STORE backend: {CONVERSATION_BACKEND!r}")
+    return InMemoryConversationStore()
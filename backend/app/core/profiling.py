@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import hmac
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from app.config import env_float, env_int, env_str
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+# "sampling": wall-clock stack samples of every thread, saved as collapsed
+# stacks (flamegraph.pl / speedscope). "cprofile": deterministic cProfile of
+# the event-loop thread, saved as pstats.
+PROFILING_MODE = env_str("PROFILING_MODE", "sampling").lower()
+PROFILING_DIR = Path(env_str("PROFILING_DIR", str(REPO_ROOT / "data" / "profiles")))
+# Requests sending `X-Profile: <token>` are profiled; unset disables the header.
+PROFILING_TOKEN = env_str("PROFILING_TOKEN")
+# Share of all requests profiled without the header (0 = header only).
+PROFILING_SAMPLE_RATE = env_float("PROFILING_SAMPLE_RATE", 0)
+# Minimum gap between two sampled (not header-requested) profiles.
+PROFILING_MIN_INTERVAL_SECONDS = env_float("PROFILING_MIN_INTERVAL_SECONDS", 10)
+PROFILING_MAX_PROFILES = max(1, env_int("PROFILING_MAX_PROFILES", 50))
+PROFILING_MAX_SECONDS = env_float("PROFILING_MAX_SECONDS", 30)
+PROFILING_INTERVAL_MS = env_float("PROFILING_INTERVAL_MS", 5)
+# The sampler backs off so its own work stays under this share of wall time.
+PROFILING_MAX_OVERHEAD = env_float("PROFILING_MAX_OVERHEAD", 0.02)
+
+_MAX_DEPTH = 128
+_REQUEST_ID_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+Scope = dict[str, Any]
+Message = dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+def _frame_name(frame: Any) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__") or Path(code.co_filename).stem
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _collapse(thread_name: str, frame: Any) -> str:
+    names = []
+    while frame is not None and len(names) < _MAX_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names)).replace(" ", "_")
+
+
+class _StackSampler:
+    """
+    Background thread that samples the stacks of all other threads every
+    `interval` seconds and counts identical stacks. The interval grows when
+    a sample costs more than `max_overhead` of the time between samples.
+    """
+
+    extension = "collapsed"
+
+    def __init__(self, interval: float, max_seconds: float, max_overhead: float) -> None:
+        self.interval = max(0.001, interval)
+        self.max_seconds = max_seconds
+        self.max_overhead = max(0.001, max_overhead)
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        interval = self.interval
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(interval) and time.monotonic() < deadline:
+            # CPU time, so waiting for the GIL does not count as overhead.
+            started = time.thread_time()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._stacks[_collapse(names.get(ident, f"thread-{ident}"), frame)] += 1
+            self.samples += 1
+            interval = max(self.interval, (time.thread_time() - started) / self.max_overhead)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def save(self, path: Path) -> None:
+        self._thread.join()
+        path.write_text("".join(f"{stack} {n}\n" for stack, n in self._stacks.most_common()), encoding="utf-8")
+
+
+class _DeterministicProfiler:
+    """
+    cProfile on the calling (event-loop) thread; switched off after
+    max_seconds. Work handed to worker threads shows up as time spent waiting.
+    """
+
+    extension = "prof"
+
+    def __init__(self, max_seconds: float) -> None:
+        self.max_seconds = max_seconds
+        self._profile = cProfile.Profile()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def start(self) -> None:
+        self._profile.enable()
+        self._timer = asyncio.get_running_loop().call_later(self.max_seconds, self._profile.disable)
+
+    def stop(self) -> None:
+        self._profile.disable()
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def save(self, path: Path) -> None:
+        self._profile.dump_stats(str(path))
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and keeps the saved reports bounded.
+    At most one request is profiled at a time; others run unprofiled.
+    """
+
+    def __init__(
+        self,
+        mode: str = PROFILING_MODE,
+        directory: Path = PROFILING_DIR,
+        token: str = PROFILING_TOKEN,
+        sample_rate: float = PROFILING_SAMPLE_RATE,
+        min_interval_seconds: float = PROFILING_MIN_INTERVAL_SECONDS,
+        max_profiles: int = PROFILING_MAX_PROFILES,
+        max_seconds: float = PROFILING_MAX_SECONDS,
+    ) -> None:
+        if mode not in ("sampling", "cprofile"):
+            raise ValueError(f"unknown PROFILING_MODE: {mode}")
+        self.mode = mode
+        self.directory = directory
+        self.token = token
+        self.sample_rate = sample_rate
+        self.min_interval_seconds = min_interval_seconds
+        self.max_profiles = max_profiles
+        self.max_seconds = max_seconds
+        self.enabled = bool(token) or sample_rate > 0
+        self._busy = threading.Lock()
+        self._last_sampled = float("-inf")
+        self.saved = 0
+        self.skipped_busy = 0
+
+    def wanted(self, headers: list[tuple[bytes, bytes]]) -> bool:
+        if self.token:
+            for name, value in headers:
+                if name == b"x-profile":
+                    return hmac.compare_digest(value, self.token.encode("utf-8"))
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            now = time.monotonic()
+            if now - self._last_sampled >= self.min_interval_seconds:
+                self._last_sampled = now
+                return True
+        return False
+
+    def start(self) -> _StackSampler | _DeterministicProfiler | None:
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return None
+        if self.mode == "cprofile":
+            profiler: _StackSampler | _DeterministicProfiler = _DeterministicProfiler(self.max_seconds)
+        else:
+            profiler = _StackSampler(PROFILING_INTERVAL_MS / 1000, self.max_seconds, PROFILING_MAX_OVERHEAD)
+        try:
+            profiler.start()
+        except BaseException:
+            self._busy.release()
+            raise
+        return profiler
+
+    def save(self, profiler: _StackSampler | _DeterministicProfiler, request_id: str) -> Path:
+        """
+        Writes a stopped profiler's report to <directory>/<request id>.<ext>
+        and deletes the oldest reports beyond max_profiles. Blocking; the next
+        profile can start once it returns.
+        """
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{request_id}.{profiler.extension}"
+            profiler.save(path)
+            self.saved += 1
+            self._prune()
+            return path
+        finally:
+            self._busy.release()
+
+    def _prune(self) -> None:
+        reports = sorted(
+            (p for p in self.directory.iterdir() if p.suffix in (".collapsed", ".prof")),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for stale in reports[: max(0, len(reports) - self.max_profiles)]:
+            stale.unlink(missing_ok=True)
+
+
+def _request_id(headers: list[tuple[bytes, bytes]]) -> str:
+    for name, value in headers:
+        if name == b"x-request-id":
+            cleaned = _REQUEST_ID_RE.sub("", value.decode("latin-1"))[:64].lstrip(".")
+            if cleaned:
+                return cleaned
+    return uuid.uuid4().hex
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling selected requests end to end, streamed bodies
+    included. A profiled response carries `X-Profile-Id`, the request id its
+    report is saved under (the client's X-Request-ID when it sends one).
+    """
+
+    def __init__(self, app: Callable[[Scope, Receive, Send], Awaitable[None]], profiler: RequestProfiler | None = None) -> None:
+        self.app = app
+        self.profiler = profiler or RequestProfiler()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.profiler.enabled or not self.profiler.wanted(scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = self.profiler.start()
+        if profiler is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope["headers"])
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", request_id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # cProfile must be disabled on the thread that enabled it.
+            profiler.stop()
+            await asyncio.to_thread(self.profiler.save, profiler, request_id)
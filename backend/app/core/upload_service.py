@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import io
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, AsyncIterator, Callable
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.analytics import SummaryState
+from app.categorize import iter_categorized_transactions, new_stats
+from app.config import env_int
+from app.ingest import iter_transactions_from_file
+
+# Body chunks buffered between the request and the parsing thread; with
+# ~64 KB chunks this bounds the in-flight upload to a few hundred KB.
+UPLOAD_QUEUE_CHUNKS = 8
+# Uploads parsed at once, each holding one thread of a dedicated pool for
+# its whole body; further uploads are rejected (UploadBusy) until one ends.
+UPLOAD_MAX_CONCURRENT = max(1, env_int("UPLOAD_MAX_CONCURRENT", 4))
+
+_SLOTS = threading.BoundedSemaphore(UPLOAD_MAX_CONCURRENT)
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+class UploadError(ValueError):
+    """The upload is not a readable transactions CSV."""
+
+
+class UploadBusy(RuntimeError):
+    """All upload parser threads are in use."""
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=UPLOAD_MAX_CONCURRENT, thread_name_prefix="upload")
+        return _EXECUTOR
+
+
+class _ChunkReader(io.RawIOBase):
+    """
+    Blocking raw stream over body chunks handed in from the event loop, so
+    the regular csv/ingest code can read an upload while it is still arriving.
+    The loop side never blocks a thread: a full queue is waited out on an
+    asyncio.Event that the reader sets whenever it takes a chunk.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._chunks: queue.Queue[bytes | None] = queue.Queue(maxsize=UPLOAD_QUEUE_CHUNKS)
+        self._pending = b""
+        self._eof = False
+        self._loop = loop
+        self._space = asyncio.Event()
+        # Set by the reader when it stops consuming, and by the feeding side
+        # when the body cannot be completed.
+        self.abandoned = threading.Event()
+        self.interrupted = threading.Event()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            if self._eof:
+                return 0
+            if self.interrupted.is_set():
+                raise UploadError("upload interrupted")
+            try:
+                chunk = self._chunks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._notify()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._pending = chunk
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+    def abandon(self) -> None:
+        self.abandoned.set()
+        self._notify()
+
+    def _notify(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._space.set)
+        except RuntimeError:
+            # The loop is closed; nobody is feeding any more.
+            pass
+
+    async def feed(self, chunk: bytes | None) -> bool:
+        """
+        Hands one chunk (None = end of body) to the reader, waiting while the
+        queue is full; returns False once the reader has stopped consuming.
+        """
+        while not self.abandoned.is_set():
+            # Cleared before trying, so a chunk taken in between still wakes us.
+            self._space.clear()
+            try:
+                self._chunks.put_nowait(chunk)
+                return True
+            except queue.Full:
+                await self._space.wait()
+        return False
+
+
+class _MultipartCsv:
+    """
+    Incremental multipart/form-data decoder that passes through the bytes of
+    the first file part (or the part named "file") and drops everything else.
+    """
+
+    def __init__(self, boundary: bytes) -> None:
+        self._out: list[bytes] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._in_csv = False
+        self._found = False
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_part_data": self._on_part_data,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        is_csv = b"filename" in options or options.get(b"name") == b"file"
+        self._in_csv = is_csv and not self._found
+        self._found = self._found or self._in_csv
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_csv:
+            self._out.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        self._in_csv = False
+
+    def feed(self, chunk: bytes) -> bytes:
+        try:
+            self._parser.write(chunk)
+        except MultipartParseError as exc:
+            raise UploadError(f"malformed multipart upload: {exc}") from exc
+        out, self._out = b"".join(self._out), []
+        return out
+
+    def finish(self) -> None:
+        try:
+            self._parser.finalize()
+        except MultipartParseError as exc:
+            raise UploadError(f"malformed multipart upload: {exc}") from exc
+        if not self._found:
+            raise UploadError("multipart upload has no file part")
+
+
+def _body_decoder(content_type: str) -> tuple[Callable[[bytes], bytes], Callable[[], None]]:
+    mime, options = parse_options_header(content_type or "")
+    if mime == b"multipart/form-data":
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise UploadError("multipart upload without a boundary")
+        multipart = _MultipartCsv(boundary)
+        return multipart.feed, multipart.finish
+    return (lambda chunk: chunk), (lambda: None)
+
+
+def summarize_csv_stream(reader: io.RawIOBase, use_llm: bool = True) -> tuple[dict[str, Any], dict[str, int]]:
+    """
+    Parses, categorizes and aggregates a CSV byte stream row by row. Holds at
+    most one categorization batch of rows plus the SummaryState aggregates.
+    """
+    text = io.TextIOWrapper(io.BufferedReader(reader), encoding="utf-8-sig", newline="")
+    stats = new_stats()
+    rows = (asdict(tx) for tx in iter_transactions_from_file(text))
+    state = SummaryState().add(iter_categorized_transactions(rows, use_llm=use_llm, stats=stats))
+    return state.summary(), stats
+
+
+async def summarize_upload(
+    body: AsyncIterator[bytes],
+    content_type: str,
+    use_llm: bool = True,
+) -> dict[str, Any]:
+    """
+    Streams a request body (raw CSV, or multipart/form-data with a CSV file
+    part) through the ingest, categorization and summary pipeline as it
+    arrives. Parsing runs in a thread of a dedicated pool and the body is
+    handed over in bounded chunks, so it is never held whole: memory is the
+    chunk queue, one categorization batch and the SummaryState aggregates.
+
+    Returns {"summary", "stats", "bytes", "seconds"}; raises UploadError
+    for an unreadable upload and UploadBusy when UPLOAD_MAX_CONCURRENT
+    uploads are already being parsed.
+    """
+    started = time.perf_counter()
+    decode, finish = _body_decoder(content_type)
+    if not _SLOTS.acquire(blocking=False):
+        raise UploadBusy(f"too many concurrent uploads (limit {UPLOAD_MAX_CONCURRENT})")
+    loop = asyncio.get_running_loop()
+    reader = _ChunkReader(loop)
+
+    def work() -> tuple[dict[str, Any], dict[str, int]]:
+        try:
+            return summarize_csv_stream(reader, use_llm=use_llm)
+        finally:
+            reader.abandon()
+            _SLOTS.release()
+
+    try:
+        # Own pool, so a parser blocked on a slow body never starves the
+        # default executor (asyncio.to_thread) the rest of the app runs on.
+        worker = loop.run_in_executor(_executor(), contextvars.copy_context().run, work)
+    except BaseException:
+        _SLOTS.release()
+        raise
+    received = 0
+    try:
+        async for chunk in body:
+            received += len(chunk)
+            data = decode(chunk)
+            if data and not await reader.feed(data):
+                # The parser gave up (e.g. missing columns); its error is raised below.
+                break
+        else:
+            finish()
+            await reader.feed(None)
+    except BaseException:
+        reader.interrupted.set()
+        worker.add_done_callback(lambda future: future.cancelled() or future.exception())
+        raise
+
+    try:
+        summary, stats = await worker
+    except ValueError as exc:
+        raise UploadError(str(exc)) from exc
+    return {
+        "summary": summary,
+        "stats": stats,
+        "bytes": received,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
@@ -1,13 +1,41 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from app.llm_clients import client_stats, close_clients
+from app.llm_guard import breaker_state
+from app.metrics import render_prometheus, span
+from app.response_cache import RESPONSE_CACHE
+from backend.app.api.schemas import ChatRequest, ChatResponse, UploadResponse
+from backend.app.core.agent_service import (
+    CONVERSATION_STORE,
+    chat_with_agent_async,
+    chat_with_agent_stream,
+    store_user_summary,
+    warm_caches,
+)
+from backend.app.core.profiling import ProfilingMiddleware
+from backend.app.core.upload_service import UploadBusy, UploadError, summarize_upload
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    warm_caches()
+    try:
+        yield
+    finally:
+        close_clients()
+        CONVERSATION_STORE.close()
 
-from backend.app.api.schemas import ChatRequest, ChatResponse
-from backend.app.core.agent_service import chat_with_agent
 
-app = FastAPI(title="Where's My Money API", version="1.0.0")
+app = FastAPI(title="Where's My Money API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,19 +52,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in: profiles requests sending X-Profile: $PROFILING_TOKEN, or a
+# PROFILING_SAMPLE_RATE share of all requests (see core/profiling.py).
+app.add_middleware(ProfilingMiddleware)
+
 
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/llm")
+def health_llm() -> dict:
+    return {"breaker": breaker_state(), "clients": client_stats(), "response_cache": RESPONSE_CACHE.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """
+    Stage latency histograms and LLM/cache counters in the Prometheus text format.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(payload: ChatRequest) -> ChatResponse:
+async def chat(payload: ChatRequest) -> ChatResponse:
     try:
-        result = chat_with_agent(
+        result = await chat_with_agent_async(
             message=payload.message,
             user_id=payload.user_id,
-            context=payload.context,
+            context=payload.chat_context(),
+            timings=payload.timings,
         )
         return ChatResponse(**result)
     except ValueError as exc:
@@ -45,9 +91,54 @@ def chat(payload: ChatRequest) -> ChatResponse:
         raise HTTPException(status_code=500, detail=f"chat_failed: {exc}") from exc
 
 
+@app.post("/chat/stream")
+async def chat_stream(payload: ChatRequest) -> StreamingResponse:
+    async def events():
+        async for event, data in chat_with_agent_stream(
+            message=payload.message,
+            user_id=payload.user_id,
+            context=payload.chat_context(),
+            timings=payload.timings,
+        ):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/transactions/upload", response_model=UploadResponse)
+async def upload_transactions(request: Request, user_id: str = Query(min_length=1), use_llm: bool = True) -> UploadResponse:
+    """
+    Accepts a transactions CSV as the raw body (text/csv, chunked or not) or
+    as the file part of multipart/form-data, summarizes it while it streams
+    in, and makes it the chat data for `user_id`.
+    """
+    try:
+        with span("upload"):
+            result = await summarize_upload(request.stream(), request.headers.get("content-type", ""), use_llm=use_llm)
+    except UploadError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except UploadBusy as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"}) from exc
+
+    summary = result["summary"]
+    await asyncio.to_thread(store_user_summary, user_id, summary)
+    return UploadResponse(
+        user_id=user_id,
+        tx_count=summary["tx_count"],
+        total_spent_aed=summary["total_spent_aed"],
+        stats=result["stats"],
+        bytes=result["bytes"],
+        seconds=result["seconds"],
+    )
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(_, exc: HTTPException):
-    return JSONResponse(status_code=exc.status_code, content={"error": exc.detail})
+    return JSONResponse(status_code=exc.status_code, content={"error": exc.detail}, headers=exc.headers)
 
 
 @app.exception_handler(Exception)
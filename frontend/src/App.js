@@ -1,5 +1,5 @@
 import React, { useState } from 'react';
-import { API_BASE_URL, getHealth, sendChatMessage } from './api/client';
+import { API_BASE_URL, getHealth, streamChatMessage } from './api/client';
 
 function App() {
   const [health, setHealth] = useState(null);
@@ -26,8 +26,22 @@ function App() {
     setReply('');
 
     try {
-      const result = await sendChatMessage(message, 'demo-user');
-      setReply(result.reply || 'No reply received.');
+      let summary = '';
+      let text = '';
+      const render = () => setReply(summary && text ? `${summary}\n\n${text}` : summary || text);
+      const result = await streamChatMessage(message, 'demo-user', {
+        onSummary: (snapshot) => {
+          summary = snapshot;
+          render();
+        },
+        onDelta: (delta) => {
+          text += delta;
+          render();
+        },
+      });
+      if (!text) {
+        setReply(result.reply || 'No reply received.');
+      }
     } catch (err) {
       setError(err.message);
     } finally {
@@ -63,7 +77,7 @@ function App() {
         {reply && (
           <div style={{ marginTop: '1rem', padding: '1rem', border: '1px solid #ddd', borderRadius: 8 }}>
             <strong>Assistant:</strong>
-            <p style={{ marginBottom: 0 }}>{reply}</p>
+            <p style={{ marginBottom: 0, whiteSpace: 'pre-wrap' }}>{reply}</p>
           </div>
         )}
 
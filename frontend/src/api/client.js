@@ -30,4 +30,68 @@ export async function sendChatMessage(message, userId) {
   return parseResponse(response);
 }
 
+function parseSseBlock(block) {
+  let event = 'message';
+  const data = [];
+  block.split('\n').forEach((line) => {
+    if (line.startsWith('event:')) {
+      event = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      data.push(line.slice(5).trimStart());
+    }
+  });
+  return data.length ? { event, data: JSON.parse(data.join('\n')) } : null;
+}
+
+// Streams a reply from /chat/stream (Server-Sent Events over a POST).
+// onSummary(text) fires with the spending snapshot, onDelta(text) for each
+// piece of the reply; resolves with the final { reply, meta }.
+export async function streamChatMessage(message, userId, { onSummary, onDelta } = {}) {
+  const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify({
+      message,
+      user_id: userId || undefined,
+    }),
+  });
+
+  if (!response.ok || !response.body) {
+    return parseResponse(response);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result = null;
+
+  const handle = (block) => {
+    const parsed = parseSseBlock(block);
+    if (!parsed) return;
+    const { event, data } = parsed;
+    if (event === 'summary' && onSummary) onSummary(data.text);
+    if (event === 'delta' && onDelta) onDelta(data.text);
+    if (event === 'done') result = data;
+    if (event === 'error') throw new Error(data.error || 'Request failed');
+  };
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      handle(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+  handle(buffer + decoder.decode());
+
+  if (!result) {
+    throw new Error('Stream ended before the reply was complete');
+  }
+  return result;
+}
+
 export { API_BASE_URL };
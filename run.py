@@ -29,7 +29,8 @@ def main() -> None:
     print("Coverage:")
     print(f"  Total: {stats['total']}")
     print(f"  Categorized by rules: {stats['by_rules']}")
-    print(f"  Categorized by LLM:   {stats['by_llm']}")
+    print(f"  Categorized locally:  {stats['by_local']}")
+    print(f"  Categorized by LLM:   {stats['by_llm']} ({stats['llm_lookups']} lookups, {stats['llm_calls']} provider calls, {stats['llm_deduped']} deduped)")
     print(f"  Other:                {stats['other']}\n")
 
     print("Top categories (AED):")
@@ -0,0 +1,69 @@
+"""Agent prompt context: rebuilt JSON per turn vs the compact encoding computed once per summary.
+
+Usage:
+    python scripts/bench_agent_context.py [--turns 20000]
+
+Uses the sample CSV summary. Reports context size (characters and an
+approximate token count, one token per word or punctuation run) and the
+per-turn CPU cost of producing the prompt context:
+  - before: build_agent_context() + json.dumps() on every turn (twice when
+            the turn fell back to _fallback_answer)
+  - after:  prepare_agent_context() once per summary, then attribute reads
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.analytics import build_summary
+from app.categorize import categorize_transactions
+from app.context_builder import build_agent_context, prepare_agent_context
+from app.ingest import load_transactions_table
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]+")
+
+
+def _approx_tokens(text: str) -> int:
+    return len(TOKEN_RE.findall(text))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20_000)
+    args = parser.parse_args()
+
+    table = load_transactions_table(str(ROOT / "data" / "sample_transactions.csv"))
+    table, _ = categorize_transactions(table, use_llm=False)
+    summary = build_summary(table)
+
+    as_json = json.dumps(build_agent_context(summary), ensure_ascii=False)
+    prepared = prepare_agent_context(summary)
+    print(f"{'json':8} {len(as_json):6} chars  ~{_approx_tokens(as_json):5} tokens")
+    print(f"{'compact':8} {len(prepared.text):6} chars  ~{_approx_tokens(prepared.text):5} tokens")
+
+    started = time.perf_counter()
+    for _ in range(args.turns):
+        json.dumps(build_agent_context(summary), ensure_ascii=False)
+    before = (time.perf_counter() - started) / args.turns
+
+    started = time.perf_counter()
+    cached = prepare_agent_context(summary)
+    for _ in range(args.turns):
+        cached.text, cached.fingerprint, cached.data
+    after = (time.perf_counter() - started) / args.turns
+
+    print(f"per turn: before {before * 1e6:7.2f} us  after {after * 1e6:7.2f} us  ({args.turns} turns)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
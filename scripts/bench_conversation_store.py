@@ -0,0 +1,128 @@
+"""Conversation store at 100k sessions: the old unbounded dict vs the LRU+TTL and SQLite stores.
+
+Usage:
+    python scripts/bench_conversation_store.py [--sessions 100000] [--max-sessions 10000] [--turns 3]
+
+Each simulated session takes `--turns` chat turns (get_or_create, mutate,
+save), interleaved across sessions the way concurrent users would be. Reports
+per-operation latency (p50 / p99), Python heap growth measured with
+tracemalloc, and how many sessions each store still keeps in memory. The
+SQLite store writes to a temporary file and is flushed before reporting.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app.core.conversation_store import (
+    ConversationState,
+    ConversationStore,
+    InMemoryConversationStore,
+    SQLiteConversationStore,
+)
+
+
+class DictStore(ConversationStore):
+    """The previous module-level dict, behind the same interface."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, ConversationState] = {}
+
+    def get(self, key: str) -> ConversationState | None:
+        return self._data.get(key)
+
+    def save(self, key: str, state: ConversationState) -> None:
+        self._data[key] = state
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"sessions": len(self._data)}
+
+
+def _turn(store: ConversationStore, key: str, turn: int) -> None:
+    state = store.get_or_create(key)
+    state.mode = "clarify"
+    state.questions_total = 2
+    state.questions_asked = min(turn, 2)
+    state.answers[f"q{turn + 1}"] = "cafe and delivery"
+    store.save(key, state)
+
+
+def _run(name: str, factory: Callable[[], ConversationStore], sessions: int, turns: int) -> None:
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    store = factory()
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for turn in range(turns):
+        for i in range(sessions):
+            t0 = time.perf_counter()
+            _turn(store, f"user-{i}", turn)
+            latencies.append(time.perf_counter() - t0)
+    store.flush()
+    wall = time.perf_counter() - started
+
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = store.stats()
+    in_memory = stats.get("sessions", stats.get("cached_sessions"))
+    persisted = len(store) if isinstance(store, SQLiteConversationStore) else in_memory
+    store.close()
+
+    latencies.sort()
+    print(
+        f"{name:8} {len(latencies) / wall:9.0f} turns/s  "
+        f"p50 {statistics.median(latencies) * 1e6:6.1f} us  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e6:7.1f} us  "
+        f"heap {(current - base) / 1e6:7.1f} MB  "
+        f"in memory {in_memory:>7}  stored {persisted:>7}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--max-sessions", type=int, default=10_000, help="LRU bound / SQLite front-cache size")
+    parser.add_argument("--turns", type=int, default=3, help="turns per session")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.turns} turns, bound {args.max_sessions}")
+    _run("dict", DictStore, args.sessions, args.turns)
+    _run("memory", lambda: InMemoryConversationStore(maxsize=args.max_sessions, ttl_seconds=3600), args.sessions, args.turns)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conversations.sqlite3")
+        _run(
+            "sqlite",
+            lambda: SQLiteConversationStore(path=path, ttl_seconds=3600, cache_size=args.max_sessions),
+            args.sessions,
+            args.turns,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
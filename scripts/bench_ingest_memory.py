@@ -0,0 +1,114 @@
+"""Peak RSS of the list-based, columnar and streaming ingest -> categorize -> summary pipeline.
+
+Usage:
+    python scripts/bench_ingest_memory.py [ROWS ...]
+
+Each measurement runs in a fresh subprocess so peak RSS is not shared between runs.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+MERCHANTS = [
+    ("Carrefour", "Groceries"),
+    ("Careem", "Taxi ride"),
+    ("Talabat", "Food delivery"),
+    ("Amazon", "Online shopping"),
+    ("ENOC", "Fuel refill"),
+    ("Netflix", "Monthly subscription"),
+    ("DEWA", "Electricity and water bill"),
+    ("Etisalat", "Mobile bill"),
+    ("Corner Cafe", "Coffee"),
+]
+
+
+def write_csv(path: Path, rows: int) -> None:
+    rnd = random.Random(rows)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "amount", "currency", "merchant", "description"])
+        for i in range(rows):
+            merchant, description = rnd.choice(MERCHANTS)
+            day = i % 365
+            writer.writerow(
+                [
+                    f"2024-{day // 31 % 12 + 1:02d}-{day % 28 + 1:02d}",
+                    f"-{rnd.randint(10, 900)}.{rnd.randint(0, 99):02d}",
+                    "AED",
+                    merchant,
+                    description,
+                ]
+            )
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(mode: str, path: str) -> None:
+    from app.analytics import build_summary
+    from app.categorize import categorize_transactions, iter_categorized_transactions
+    from app.ingest import iter_transactions_as_dicts, load_transactions_as_dicts, load_transactions_table
+
+    started = time.perf_counter()
+    if mode == "list":
+        txs = load_transactions_as_dicts(path)
+        txs, _ = categorize_transactions(txs, use_llm=False)
+        summary = build_summary(txs)
+    elif mode == "table":
+        table = load_transactions_table(path)
+        table, _ = categorize_transactions(table, use_llm=False)
+        summary = build_summary(table)
+    else:
+        txs = iter_categorized_transactions(iter_transactions_as_dicts(path), use_llm=False)
+        summary = build_summary(txs)
+    elapsed = time.perf_counter() - started
+    print(f"{summary['tx_count']} {elapsed:.3f} {_peak_rss_mb():.1f}")
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) >= 3 and argv[0] == "--child":
+        run_child(argv[1], argv[2])
+        return 0
+
+    row_counts = [int(a) for a in argv] or DEFAULT_ROWS
+    print(f"{'rows':>10} {'mode':>7} {'seconds':>9} {'peak_rss_mb':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in row_counts:
+            path = Path(tmp) / f"tx_{rows}.csv"
+            write_csv(path, rows)
+            for mode in ("list", "table", "stream"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, str(path)],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                    env={**os.environ, "LLM_API_KEY": ""},
+                ).stdout.split()
+                tx_count, seconds, rss = out[-3:]
+                assert int(tx_count) == rows, (tx_count, rows)
+                print(f"{rows:>10} {mode:>7} {float(seconds):>9.2f} {float(rss):>12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
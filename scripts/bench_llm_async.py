@@ -0,0 +1,88 @@
+"""Sequential vs concurrent LLM categorization against the local stub server.
+
+Usage:
+    python scripts/bench_llm_async.py [--unknowns 200] [--latency 0.2]
+        [--batch-size 5] [--concurrency 8] [--rps 0]
+
+Both paths must return identical categories in input order.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from llm_stub_server import start_stub_server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--unknowns", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    os.environ.update(
+        {
+            "LLM_PROVIDER": "openai",
+            "LLM_API_KEY": "stub",
+            "LLM_BASE_URL": base_url,
+            "LLM_CACHE_PATH": "",
+        }
+    )
+
+    from app import llm
+    from app.llm_async import classify_unknown_transactions_llm_async
+
+    kinds = ["Corner Cafe", "City Taxi", "Neighborhood Pharmacy", "Gym Club", "Unknown Vendor"]
+    items = [
+        {"merchant": f"{kinds[i % len(kinds)]} #{i}", "description": "", "amount": -10.0, "currency": "AED"}
+        for i in range(args.unknowns)
+    ]
+
+    started = time.perf_counter()
+    sequential = llm.classify_unknown_transactions_llm(items, batch_size=args.batch_size)
+    sequential_s = time.perf_counter() - started
+    sequential_requests = server.RequestHandlerClass.requests_served
+
+    started = time.perf_counter()
+    concurrent = asyncio.run(
+        classify_unknown_transactions_llm_async(
+            items,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            rate_per_sec=args.rps,
+        )
+    )
+    concurrent_s = time.perf_counter() - started
+    concurrent_requests = server.RequestHandlerClass.requests_served - sequential_requests
+    server.shutdown()
+
+    if sequential != concurrent:
+        print("MISMATCH between sequential and concurrent results")
+        return 1
+
+    print(f"unknowns={args.unknowns} batch_size={args.batch_size} latency={args.latency}s")
+    print(f"sequential: {sequential_s:6.2f}s  requests={sequential_requests}")
+    print(
+        f"concurrent: {concurrent_s:6.2f}s  requests={concurrent_requests} "
+        f"(concurrency={args.concurrency}, rps={args.rps or 'unlimited'}) "
+        f"-> {sequential_s / concurrent_s:.1f}x"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
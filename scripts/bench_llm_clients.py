@@ -0,0 +1,94 @@
+"""Fresh LLM client per call vs the pooled client registry, against the local stub.
+
+Usage:
+    python scripts/bench_llm_clients.py [--calls 200] [--threads 8] [--latency 0]
+
+Reports per-call latency (mean / p95) and total throughput for both modes,
+sequentially and from a thread pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from llm_stub_server import start_stub_server
+
+PROMPT = 'Transaction:\n{"merchant": "Corner Cafe", "description": "", "amount": -12.0, "currency": "AED"}'
+
+
+def _run(call: Callable[[], None], calls: int, threads: int) -> tuple:
+    latencies: List[float] = []
+
+    def timed(_: int) -> None:
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    if threads <= 1:
+        for i in range(calls):
+            timed(i)
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(timed, range(calls)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return (
+        statistics.mean(latencies) * 1000,
+        latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        calls / wall,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+
+    from openai import OpenAI
+
+    from app.llm_clients import client_stats, close_clients, get_client
+
+    def request(client) -> None:
+        client.responses.create(model="stub", instructions="", input=PROMPT, temperature=0)
+
+    def fresh() -> None:
+        client = OpenAI(api_key="stub", base_url=base_url)
+        request(client)
+        client.close()
+
+    def pooled() -> None:
+        request(get_client("openai", "stub", "stub", base_url))
+
+    pooled()  # build the shared client outside the timed runs
+
+    print(f"calls={args.calls} latency={args.latency}s")
+    for threads in (1, args.threads):
+        for name, call in (("fresh ", fresh), ("pooled", pooled)):
+            mean_ms, p95_ms, rps = _run(call, args.calls, threads)
+            print(f"threads={threads:<2} {name}: mean {mean_ms:7.2f} ms  p95 {p95_ms:7.2f} ms  {rps:8.1f} calls/s")
+
+    print("registry:", client_stats())
+    close_clients()
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Single-pass build_summary vs the per-metric analytics functions.
+
+Usage:
+    python scripts/bench_summary.py [ROWS ...] [--legacy-max N]
+
+For every size the engine output must equal the result of composing
+total_spent / top_categories / top_merchants / detect_* exactly. The
+legacy composition needs the whole list in memory, so it is skipped above
+--legacy-max rows (default 2,000,000); the engine itself streams.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import analytics
+from app.analytics import build_summary
+
+DEFAULT_ROWS = [10_000, 1_000_000, 10_000_000]
+CATEGORIES = [
+    "groceries", "food_delivery", "transport", "shopping", "fuel",
+    "utilities", "telecom", "subscriptions", "digital_services", "other", "income",
+]
+MERCHANTS = [f"Merchant {i}" for i in range(400)]
+DATES = [f"2024-{m:02d}-{d:02d}" for m in range(1, 13) for d in range(1, 29)]
+
+
+def generate(rows: int, seed: int = 7) -> Iterator[Dict]:
+    rnd = random.Random(seed)
+    for _ in range(rows):
+        amount = -round(rnd.lognormvariate(4, 1), 2)
+        if rnd.random() < 0.03:
+            amount = -amount
+        yield {
+            "date": rnd.choice(DATES),
+            "amount": amount,
+            "currency": "AED",
+            "merchant": rnd.choice(MERCHANTS),
+            "description": "",
+            "category": rnd.choice(CATEGORIES),
+        }
+
+
+def legacy_summary(txs: List[Dict]) -> Dict:
+    return {
+        "tx_count": len(txs),
+        "total_spent_aed": analytics.total_spent(txs),
+        "top_categories_aed": analytics.top_categories(txs, n=6),
+        "top_merchants_aed": analytics.top_merchants(txs, n=6),
+        "subscriptions": [asdict(hit) for hit in analytics.detect_subscriptions(txs)],
+        "recurring_bills": [asdict(hit) for hit in analytics.detect_recurring_bills(txs)],
+        "anomalies": [asdict(hit) for hit in analytics.detect_anomalies(txs)],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", nargs="*", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--legacy-max", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy_s':>9} {'engine_s':>9} {'speedup':>8}  match")
+    for rows in args.rows:
+        if rows <= args.legacy_max:
+            txs = list(generate(rows))
+            started = time.perf_counter()
+            expected = legacy_summary(txs)
+            legacy_s = time.perf_counter() - started
+
+            started = time.perf_counter()
+            actual = build_summary(txs)
+            engine_s = time.perf_counter() - started
+
+            if actual != expected:
+                print(f"{rows:>10} MISMATCH")
+                return 1
+            print(f"{rows:>10} {legacy_s:>9.2f} {engine_s:>9.2f} {legacy_s / engine_s:>7.1f}x  yes")
+            del txs
+        else:
+            started = time.perf_counter()
+            build_summary(generate(rows))
+            engine_s = time.perf_counter() - started
+            print(f"{rows:>10} {'-':>9} {engine_s:>9.2f} {'-':>8}  (legacy skipped, streamed)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
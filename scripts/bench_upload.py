@@ -0,0 +1,103 @@
+"""Server memory while streaming CSV uploads of growing size to /transactions/upload.
+
+Usage:
+    python scripts/bench_upload.py [ROWS ...]
+
+Starts a fresh single-worker uvicorn per size (LLM disabled), streams a
+generated CSV as a chunked request body and reports throughput and the
+server's peak RSS (VmHWM from /proc, Linux only). Flat peak RSS across sizes
+means the upload is never buffered whole.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+for path in (ROOT, SCRIPTS):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from bench_ingest_memory import MERCHANTS
+from load_test_chat import _free_port, _wait_ready
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+
+
+def csv_chunks(rows: int, rows_per_chunk: int = 1000) -> Iterator[bytes]:
+    rnd = random.Random(rows)
+    yield b"date,amount,currency,merchant,description\n"
+    lines = []
+    for i in range(rows):
+        merchant, description = rnd.choice(MERCHANTS)
+        day = i % 365
+        lines.append(
+            f"2024-{day // 31 % 12 + 1:02d}-{day % 28 + 1:02d},"
+            f"-{rnd.randint(10, 900)}.{rnd.randint(0, 99):02d},AED,{merchant},{description}\n"
+        )
+        if len(lines) == rows_per_chunk:
+            yield "".join(lines).encode("utf-8")
+            lines = []
+    if lines:
+        yield "".join(lines).encode("utf-8")
+
+
+def _peak_rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def main(argv: list[str]) -> int:
+    import httpx
+
+    row_counts = [int(a) for a in argv] or DEFAULT_ROWS
+    env = {**os.environ, "LLM_API_KEY": "", "LLM_CACHE_PATH": ""}
+    print(f"{'rows':>10} {'MB sent':>8} {'seconds':>8} {'rows/s':>9} {'idle_rss_mb':>12} {'peak_rss_mb':>12}")
+    for rows in row_counts:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(port), "--log-level", "warning"],
+            env=env,
+            cwd=str(ROOT),
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            _wait_ready(f"{base_url}/health")
+            idle = _peak_rss_mb(server.pid)
+            started = time.perf_counter()
+            resp = httpx.post(
+                f"{base_url}/transactions/upload",
+                params={"user_id": "bench", "use_llm": "false"},
+                content=csv_chunks(rows),
+                headers={"content-type": "text/csv"},
+                timeout=600,
+            )
+            elapsed = time.perf_counter() - started
+            resp.raise_for_status()
+            result = resp.json()
+            assert result["tx_count"] == rows, (result["tx_count"], rows)
+            print(
+                f"{rows:>10} {result['bytes'] / 1e6:>8.1f} {elapsed:>8.2f} {rows / elapsed:>9.0f} "
+                f"{idle:>12.1f} {_peak_rss_mb(server.pid):>12.1f}"
+            )
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,112 @@
+"""Row-object vs columnar transactions in ChatRequest.context: payload size, parse time, time to summary.
+
+Usage:
+    python scripts/bench_wire_format.py [ROWS ...] [--repeat 5]
+
+For each size the same generated transactions are encoded both ways:
+  rows:     context.transactions = [{"date", "amount", "currency", "merchant", "description"}, ...]
+  columnar: context.columns = {"date": [...], "amount": [...], "merchants": [...],
+                               "merchant": [codes], "currency": "AED", "description": [...]}
+and reported as JSON size, ChatRequest.model_validate_json time, and parse +
+categorize (rules only) + summary time through build_summary_for_chat with
+an empty summary cache. Both formats must produce the same summary.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+for path in (ROOT, SCRIPTS):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+os.environ["LLM_API_KEY"] = ""
+
+from bench_ingest_memory import MERCHANTS
+from backend.app.api.schemas import ChatRequest
+from backend.app.core import agent_service
+
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+
+
+def generate(rows: int) -> List[Dict[str, Any]]:
+    rnd = random.Random(rows)
+    txs = []
+    for i in range(rows):
+        merchant, description = rnd.choice(MERCHANTS)
+        day = i % 365
+        txs.append(
+            {
+                "date": f"2024-{day // 31 % 12 + 1:02d}-{day % 28 + 1:02d}",
+                "amount": -round(rnd.uniform(10, 900), 2),
+                "currency": "AED",
+                "merchant": merchant,
+                "description": description,
+            }
+        )
+    return txs
+
+
+def to_columns(txs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merchants: Dict[str, int] = {}
+    codes = [merchants.setdefault(tx["merchant"], len(merchants)) for tx in txs]
+    return {
+        "date": [tx["date"] for tx in txs],
+        "amount": [tx["amount"] for tx in txs],
+        "merchants": list(merchants),
+        "merchant": codes,
+        "currency": "AED",
+        "description": [tx["description"] for tx in txs],
+    }
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _summarize(body: bytes) -> dict:
+    agent_service.SUMMARY_CACHE.clear()
+    request = ChatRequest.model_validate_json(body)
+    summary, _, _ = agent_service.build_summary_for_chat(request.chat_context(), request.user_id)
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("rows", nargs="*", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'format':>9} {'MB':>7} {'parse_ms':>9} {'summary_ms':>11}")
+    for rows in args.rows:
+        txs = generate(rows)
+        bodies = {
+            "rows": json.dumps({"message": "hi", "context": {"transactions": txs}}).encode(),
+            "columnar": json.dumps({"message": "hi", "context": {"columns": to_columns(txs)}}).encode(),
+        }
+        summaries = []
+        for name, body in bodies.items():
+            parse = _best(lambda: ChatRequest.model_validate_json(body), args.repeat)
+            total = _best(lambda: _summarize(body), args.repeat)
+            summaries.append(_summarize(body))
+            print(f"{rows:>8} {name:>9} {len(body) / 1e6:>7.2f} {parse * 1000:>9.1f} {total * 1000:>11.1f}")
+        assert summaries[0] == summaries[1], "row and columnar summaries differ"
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
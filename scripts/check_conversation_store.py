@@ -0,0 +1,87 @@
+"""Two SQLite conversation stores on one file, as two uvicorn workers would be.
+
+Usage:
+    python scripts/check_conversation_store.py
+
+Fails (exit 1) unless a change flushed by one store is what the other one's
+next get() returns, unchanged sessions are served from the front without
+re-parsing, and of two concurrent turns on one session the later flush is
+reported as a conflict instead of overwriting the first.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app.core.conversation_store import SQLiteConversationStore
+
+
+def _expect(failures: List[str], what: str, got: object, expected: object) -> None:
+    if got != expected:
+        failures.append(f"{what}: got {got!r}, expected {expected!r}")
+
+
+def run(path: str) -> List[str]:
+    failures: List[str] = []
+    # A long flush interval, so only the explicit flush() calls below write.
+    a = SQLiteConversationStore(path, flush_interval=3600)
+    b = SQLiteConversationStore(path, flush_interval=3600)
+    try:
+        state = a.get_or_create("user")
+        a.flush()
+        _expect(failures, "B sees A's new session", b.get("user"), state)
+
+        state = b.get("user")
+        state.mode, state.questions_asked = "questionnaire", 2
+        b.save("user", state)
+        _expect(failures, "A before B flushes", a.get("user").mode, "idle")
+        b.flush()
+        seen = a.get("user")
+        _expect(failures, "A after B flushed", (seen.mode, seen.questions_asked), ("questionnaire", 2))
+
+        misses = a.stats()["cache_misses"]
+        a.get("user")
+        a.get("user")
+        _expect(failures, "A re-parsed an unchanged session", a.stats()["cache_misses"], misses)
+
+        mine, theirs = a.get("user"), b.get("user")
+        mine.answers["q1"] = "from A"
+        theirs.answers["q1"] = "from B"
+        a.save("user", mine)
+        b.save("user", theirs)
+        a.flush()
+        b.flush()
+        _expect(failures, "conflicts reported by B", b.stats()["conflicts"], 1)
+        _expect(failures, "B after its write lost", b.get("user").answers, {"q1": "from A"})
+        _expect(failures, "A keeps its write", a.get("user").answers, {"q1": "from A"})
+
+        state = b.get("user")
+        state.answers["q2"] = "from B"
+        b.save("user", state)
+        b.flush()
+        _expect(failures, "B writes again once it re-read", a.get("user").answers, {"q1": "from A", "q2": "from B"})
+        _expect(failures, "conflicts reported by A", a.stats()["conflicts"], 0)
+    finally:
+        a.close()
+        b.close()
+    return failures
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = run(str(Path(tmp) / "conversations.sqlite3"))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("check_conversation_store: " + ("FAIL" if failures else "PASS"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Import-time regression check for the backend and CLI entry points.
+
+Usage:
+    python scripts/check_import_time.py [--runs 5] [--show 10]
+
+Imports each entry point in a fresh interpreter under `python -X importtime`
+(best of --runs) and fails (exit 1) when:
+  - a module that must stay lazy is imported at startup (LLM SDKs, httpx,
+    pandas, streamlit; asyncio for the CLI), or
+  - the import time of the repo's own modules (app.*, backend.*, run),
+    summed over their self times, exceeds the entry point's budget.
+The total cumulative time is reported too, but not checked: it is
+dominated by third-party packages (fastapi, pydantic) and the machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+LAZY_EVERYWHERE = ("openai", "anthropic", "httpx", "pandas", "streamlit")
+
+
+@dataclass(frozen=True)
+class EntryPoint:
+    module: str
+    own_budget_ms: float
+    lazy: Tuple[str, ...] = LAZY_EVERYWHERE
+
+
+ENTRY_POINTS = [
+    EntryPoint("backend.app.main", own_budget_ms=120),
+    EntryPoint("backend.app.core.agent_service", own_budget_ms=100),
+    EntryPoint("run", own_budget_ms=60, lazy=LAZY_EVERYWHERE + ("asyncio",)),
+]
+
+
+def _is_own(name: str) -> bool:
+    return name == "run" or name.split(".", 1)[0] in ("app", "backend")
+
+
+def _import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    {module name: (self us, cumulative us)} for one fresh import of module.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(ROOT),
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if self_us.isdigit():
+            times[name] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def check(entry: EntryPoint, runs: int, show: int) -> List[str]:
+    best = None
+    for _ in range(runs):
+        times = _import_times(entry.module)
+        own_us = sum(self_us for name, (self_us, _) in times.items() if _is_own(name))
+        if best is None or own_us < best[0]:
+            best = (own_us, times)
+    own_us, times = best
+
+    total_ms = times[entry.module][1] / 1000
+    print(f"{entry.module}: own {own_us / 1000:.1f} ms (budget {entry.own_budget_ms:.0f}), total {total_ms:.1f} ms")
+    own = sorted(((self_us, name) for name, (self_us, _) in times.items() if _is_own(name)), reverse=True)
+    for self_us, name in own[:show]:
+        print(f"    {self_us / 1000:7.2f} ms  {name}")
+
+    failures = [f"{entry.module} imports {name} at startup" for name in entry.lazy if name in times]
+    if own_us / 1000 > entry.own_budget_ms:
+        failures.append(f"{entry.module}: own modules take {own_us / 1000:.1f} ms > {entry.own_budget_ms:.0f} ms")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--show", type=int, default=5, help="slowest own modules to list per entry point")
+    args = parser.parse_args()
+
+    failures = []
+    for entry in ENTRY_POINTS:
+        failures += check(entry, max(1, args.runs), args.show)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("check_import_time: " + ("FAIL" if failures else "PASS"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Concurrent uploads must not starve (or deadlock) the default executor.
+
+Usage:
+    python scripts/check_upload_concurrency.py [--executor-threads 2]
+
+Runs the app in-process with a deliberately small default executor (the one
+asyncio.to_thread uses) and streams UPLOAD_MAX_CONCURRENT slow uploads at
+once, more than that executor has threads. Fails (exit 1) unless all of them
+complete, one more upload meanwhile gets 503, and a /chat turn (summary work
+on asyncio.to_thread) is answered while the uploads are still streaming.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, List
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+for path in (ROOT, SCRIPTS):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+os.environ["LLM_API_KEY"] = ""
+
+import httpx
+
+from backend.app.core.upload_service import UPLOAD_MAX_CONCURRENT
+from backend.app.main import app
+from bench_upload import csv_chunks
+
+TIMEOUT_SECONDS = 30
+
+
+async def _slow_body(rows: int, delay: float) -> AsyncIterator[bytes]:
+    for chunk in csv_chunks(rows, rows_per_chunk=100):
+        await asyncio.sleep(delay)
+        yield chunk
+
+
+async def _upload(client: httpx.AsyncClient, user: str, delay: float) -> httpx.Response:
+    return await client.post(
+        "/transactions/upload",
+        params={"user_id": user, "use_llm": "false"},
+        content=_slow_body(2000, delay),
+        headers={"content-type": "text/csv"},
+    )
+
+
+async def run(executor_threads: int) -> List[str]:
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=executor_threads))
+    failures = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=TIMEOUT_SECONDS) as client:
+        started = time.perf_counter()
+        uploads = [asyncio.create_task(_upload(client, f"user-{i}", 0.02)) for i in range(UPLOAD_MAX_CONCURRENT)]
+        await asyncio.sleep(0.1)
+
+        extra = await _upload(client, "extra", 0)
+        if extra.status_code != 503:
+            failures.append(f"upload past the limit got {extra.status_code}, expected 503")
+
+        chat = await asyncio.wait_for(client.post("/chat", json={"message": "Where does my money go?"}), TIMEOUT_SECONDS)
+        chat_seconds = time.perf_counter() - started
+        if chat.status_code != 200:
+            failures.append(f"/chat during uploads got {chat.status_code}")
+        if all(task.done() for task in uploads):
+            failures.append("uploads finished before /chat; make the bodies slower")
+
+        try:
+            responses = await asyncio.wait_for(asyncio.gather(*uploads), TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            failures.append(f"uploads still running after {TIMEOUT_SECONDS}s (deadlock)")
+            responses = []
+        for response in responses:
+            if response.status_code != 200:
+                failures.append(f"upload got {response.status_code}: {response.text}")
+        print(
+            f"{UPLOAD_MAX_CONCURRENT} concurrent uploads on a {executor_threads}-thread default executor: "
+            f"{sum(r.status_code == 200 for r in responses)} ok in {time.perf_counter() - started:.2f}s, "
+            f"/chat answered after {chat_seconds:.2f}s, extra upload -> {extra.status_code}"
+        )
+
+        after = await _upload(client, "after", 0)
+        if after.status_code != 200:
+            failures.append(f"upload after the others got {after.status_code}: {after.text}")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--executor-threads", type=int, default=2)
+    args = parser.parse_args()
+    if UPLOAD_MAX_CONCURRENT <= args.executor_threads:
+        print(f"UPLOAD_MAX_CONCURRENT={UPLOAD_MAX_CONCURRENT} must exceed --executor-threads")
+        return 2
+
+    failures = asyncio.run(run(args.executor_threads))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("check_upload_concurrency: " + ("FAIL" if failures else "PASS"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Routing accuracy of the agent intent router on a labelled question set.
+
+Usage:
+    python scripts/eval_intent_router.py [--questions data/intent_questions.csv] [--threshold 0.75] [--show-errors]
+
+Each row labels a question with the intent it should be answered by locally
+(anomalies, savings, top_spending, overview) or "open" when it needs the LLM,
+and names its split: "tuning" rows were used to write the patterns,
+"held_out" rows were not, so only their figures measure generalization. A
+question counts as correctly routed when the router's decision (local
+intent, or LLM) matches the label. Per split, also reports:
+  - LLM calls avoided: share of questions answered locally
+  - false local: share of "open" questions answered locally (the costly error)
+  - missed local: share of lookup questions still sent to the LLM
+Then a confusion table over all rows and the mean time to route and render
+a local answer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import agent_chat
+from app.agent_chat import _local_answer, route_question
+from app.analytics import build_summary
+from app.categorize import categorize_transactions
+from app.context_builder import build_agent_context
+from app.ingest import load_transactions_table
+
+
+SPLITS = ("held_out", "tuning")
+
+
+def _load(path: Path) -> List[Tuple[str, str, str]]:
+    with path.open(newline="", encoding="utf-8") as handle:
+        return [(row["question"], row["intent"], row["split"]) for row in csv.DictReader(handle)]
+
+
+def _report(name: str, routed: List[Tuple[str, str]]) -> None:
+    """
+    routed: (label, predicted) pairs, predicted being "open" for the LLM.
+    """
+    total = len(routed)
+    open_total = sum(label == "open" for label, _ in routed)
+    lookup_total = total - open_total
+    correct = sum(label == predicted for label, predicted in routed)
+    local = sum(predicted != "open" for _, predicted in routed)
+    false_local = sum(label == "open" and predicted != "open" for label, predicted in routed)
+    missed_local = sum(label != "open" and predicted == "open" for label, predicted in routed)
+    print(f"{name}: {total} questions ({lookup_total} lookup, {open_total} open)")
+    print(f"  routing accuracy:  {correct / max(1, total):.1%}")
+    print(f"  LLM calls avoided: {local / max(1, total):.1%}")
+    print(f"  false local:       {false_local / max(1, open_total):.1%} of open questions")
+    print(f"  missed local:      {missed_local / max(1, lookup_total):.1%} of lookup questions")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", default=str(ROOT / "data" / "intent_questions.csv"))
+    parser.add_argument("--threshold", type=float, default=agent_chat.INTENT_ROUTER_THRESHOLD)
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+    agent_chat.INTENT_ROUTER_THRESHOLD = args.threshold
+
+    rows = _load(Path(args.questions))
+    routed = []
+    confusion: Counter = Counter()
+    errors = []
+    for question, label, split in rows:
+        route = route_question(question)
+        predicted = route.intent if route.local else "open"
+        routed.append((split, label, predicted))
+        confusion[(label, predicted)] += 1
+        if predicted != label:
+            errors.append((split, question, label, route))
+
+    table = load_transactions_table(str(ROOT / "data" / "sample_transactions.csv"))
+    table, _ = categorize_transactions(table, use_llm=False)
+    context = build_agent_context(build_summary(table))
+    repeats = 200
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for question, _, _ in rows:
+            route = route_question(question)
+            if route.local:
+                _local_answer(context, route.intent, 300)
+    per_question_ms = (time.perf_counter() - started) / (repeats * len(rows)) * 1000
+
+    print(f"threshold {args.threshold}")
+    for split in SPLITS:
+        _report(split, [(label, predicted) for row_split, label, predicted in routed if row_split == split])
+    _report("all", [(label, predicted) for _, label, predicted in routed])
+    print(f"route + answer: {per_question_ms:.3f} ms per question")
+
+    labels = sorted({label for label, _ in confusion} | {predicted for _, predicted in confusion})
+    print("\nlabel \\ routed  " + " ".join(f"{label[:12]:>12}" for label in labels))
+    for label in labels:
+        print(f"{label[:14]:14}  " + " ".join(f"{confusion[(label, predicted)]:>12}" for predicted in labels))
+
+    if args.show_errors:
+        print()
+        for split, question, label, route in errors:
+            print(f"{split:>8} {label:>12} -> {route.intent}@{route.confidence:.2f}  {question}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""Local stand-in for the OpenAI / Anthropic HTTP APIs.
+
+Answers categorization prompts with a keyword guess after a configurable
+delay, so the LLM code paths can be exercised and benchmarked without a
+network connection or an API key.
+
+Run standalone:
+    python scripts/llm_stub_server.py [--port 8765] [--latency 0.2] [--token-delay 0.05]
+then point the app at it:
+    LLM_API_KEY=stub LLM_BASE_URL=http://127.0.0.1:8765/v1 python run.py
+
+Or use start_stub_server() from another script.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+KEYWORDS = {
+    "cafe": "food_delivery",
+    "coffee": "food_delivery",
+    "restaurant": "food_delivery",
+    "taxi": "transport",
+    "bus": "transport",
+    "pharmacy": "shopping",
+    "store": "shopping",
+    "gym": "subscriptions",
+    "cloud": "digital_services",
+    "salary": "income",
+}
+
+
+def guess_category(tx: Dict[str, Any]) -> str:
+    text = f"{tx.get('merchant', '')} {tx.get('description', '')}".lower()
+    for keyword, category in KEYWORDS.items():
+        if keyword in text:
+            return category
+    return "other"
+
+
+def answer(prompt: str) -> str:
+    if "Transactions:\n" in prompt:
+        txs = json.loads(prompt.split("Transactions:\n", 1)[1])
+        return json.dumps([guess_category(tx) for tx in txs])
+    if "Transaction:\n" in prompt:
+        tx = json.loads(prompt.split("Transaction:\n", 1)[1])
+        return json.dumps({"category": guess_category(tx)})
+    return (
+        "Thanks for asking.\n"
+        "Most of your spending goes to your top category.\n"
+        "• Set a weekly cap\n"
+        "• Cancel one subscription\n"
+        "Want me to pick the easiest cut?"
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response stalls ~40 ms on delayed ACK.
+    disable_nagle_algorithm = True
+    latency = 0.0
+    token_delay = 0.0
+    requests_served = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, *args: Any) -> None:  # keep benchmark output clean
+        pass
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with self._count_lock:
+            type(self).requests_served += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.path.endswith("/responses") and body.get("stream"):
+            self._stream_response(answer(str(body.get("input", ""))))
+            return
+
+        if self.path.endswith("/responses"):
+            text = self._generate(str(body.get("input", "")))
+            payload = {
+                "id": "resp_stub",
+                "object": "response",
+                "created_at": int(time.time()),
+                "model": body.get("model", "stub"),
+                "status": "completed",
+                "output": [
+                    {
+                        "type": "message",
+                        "id": "msg_stub",
+                        "role": "assistant",
+                        "status": "completed",
+                        "content": [{"type": "output_text", "text": text, "annotations": []}],
+                    }
+                ],
+                "parallel_tool_calls": False,
+                "tool_choice": "auto",
+                "tools": [],
+            }
+        elif self.path.endswith("/messages"):
+            messages = body.get("messages") or [{}]
+            text = self._generate(str(messages[-1].get("content", "")))
+            payload = {
+                "id": "msg_stub",
+                "type": "message",
+                "role": "assistant",
+                "model": body.get("model", "stub"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": 0, "output_tokens": 0},
+            }
+        else:
+            self.send_error(404)
+            return
+
+        raw = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _generate(self, prompt: str) -> str:
+        """
+        Non-streamed answer: also waits out the time streaming would take.
+        """
+        text = answer(prompt)
+        if self.token_delay:
+            time.sleep(self.token_delay * len(text.split(" ")))
+        return text
+
+    def _stream_response(self, text: str) -> None:
+        """
+        OpenAI Responses streaming: text deltas (one per word) as SSE events,
+        token_delay apart, then response.completed; the connection is closed
+        to end the stream.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(event: Dict[str, Any]) -> None:
+            self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        words = text.split(" ")
+        for seq, word in enumerate(words):
+            send(
+                {
+                    "type": "response.output_text.delta",
+                    "delta": word if seq == len(words) - 1 else word + " ",
+                    "item_id": "msg_stub",
+                    "output_index": 0,
+                    "content_index": 0,
+                    "logprobs": [],
+                    "sequence_number": seq,
+                }
+            )
+            if self.token_delay:
+                time.sleep(self.token_delay)
+        send({"type": "response.completed", "sequence_number": len(words), "response": {"id": "resp_stub"}})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open hundreds of connections at once.
+    request_queue_size = 1024
+
+
+def start_stub_server(latency: float = 0.0, port: int = 0, token_delay: float = 0.0) -> Tuple[StubServer, str]:
+    """
+    Starts the stub in a daemon thread. Returns (server, base_url ending in /v1).
+    `latency` is the delay before the first byte, `token_delay` the gap between
+    streamed words. Call server.shutdown() when done.
+    """
+    handler = type(
+        "Handler",
+        (StubHandler,),
+        {"latency": latency, "token_delay": token_delay, "requests_served": 0},
+    )
+    server = StubServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in LLM API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="seconds between streamed words")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.latency, args.port, args.token_delay)
+    print(f"Stub LLM API listening on {base_url} (latency {args.latency}s). Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
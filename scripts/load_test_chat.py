@@ -0,0 +1,186 @@
+"""Concurrent /chat load test: old sync handler vs the async pipeline, one uvicorn worker each.
+
+Usage:
+    python scripts/load_test_chat.py [--latency 2] [--levels 20,50,100,200] [--rounds 2]
+
+Starts the LLM stub server (scripts/llm_stub_server.py) and, for each mode, a
+single-worker uvicorn process:
+  - sync:  the previous `def chat()` handler calling chat_with_agent
+           (every in-flight chat holds one of the worker's threadpool slots)
+  - async: backend.app.main:app (`async def chat()` -> chat_with_agent_async)
+then fires `level * rounds` chats at each concurrency level and reports
+throughput and latency. Every chat reaches the LLM answer step.
+
+The stub, the server and this client share the machine, so on few cores the
+async numbers stop at the CPU limit rather than at the LLM latency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app.api.schemas import ChatRequest, ChatResponse
+
+
+def create_sync_app():
+    """
+    uvicorn factory for the pre-async handler (run with --factory).
+    """
+    from fastapi import FastAPI
+
+    from backend.app.core.agent_service import chat_with_agent
+
+    app = FastAPI()
+
+    @app.get("/health")
+    def health() -> dict:
+        return {"status": "ok"}
+
+    @app.post("/chat", response_model=ChatResponse)
+    def chat(payload: ChatRequest) -> ChatResponse:
+        return ChatResponse(**chat_with_agent(payload.message, payload.user_id, payload.chat_context()))
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not start")
+
+
+async def _fire(base_url: str, concurrency: int, total: int) -> Dict[str, float]:
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+
+        async def user() -> None:
+            nonlocal errors
+            while not queue.empty():
+                i = queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    resp = await client.post(
+                        "/chat",
+                        json={"message": "Why is my spending so high?", "user_id": f"load-{i}"},
+                    )
+                    ok = resp.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+        "errors": errors,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=2.0, help="stub LLM seconds per call")
+    parser.add_argument("--levels", default="20,50,100,200")
+    parser.add_argument("--rounds", type=int, default=2, help="requests per concurrent user")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+
+    stub_port = _free_port()
+    stub = subprocess.Popen(
+        [sys.executable, str(SCRIPTS / "llm_stub_server.py"), "--port", str(stub_port), "--latency", str(args.latency)],
+        stdout=subprocess.DEVNULL,
+    )
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": "openai",
+        "LLM_API_KEY": "stub",
+        "LLM_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        "LLM_CACHE_PATH": "",
+        # Neither the client pool nor the chat budget should be the bottleneck here.
+        "LLM_POOL_SIZE": "1024",
+        "LLM_REQUEST_BUDGET_SECONDS": "60",
+        "LLM_TIMEOUT_SECONDS": "60",
+    }
+
+    modes = {
+        "sync": ["load_test_chat:create_sync_app", "--factory", "--app-dir", str(SCRIPTS)],
+        "async": ["backend.app.main:app", "--app-dir", str(ROOT)],
+    }
+
+    print(f"stub latency={args.latency}s, requests per level = level x {args.rounds}")
+    try:
+        for mode, target in modes.items():
+            port = _free_port()
+            server = subprocess.Popen(
+                [
+                    sys.executable, "-m", "uvicorn", *target,
+                    "--port", str(port),
+                    "--workers", "1",
+                    "--log-level", "warning",
+                    "--timeout-keep-alive", "120",
+                ],
+                env=env,
+                cwd=str(ROOT),
+            )
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                _wait_ready(f"{base_url}/health")
+                asyncio.run(_fire(base_url, 4, 8))  # warm the summary cache and client pools
+                for level in levels:
+                    r = asyncio.run(_fire(base_url, level, level * args.rounds))
+                    print(
+                        f"{mode:5} concurrency={level:<4} {r['rps']:7.1f} req/s  "
+                        f"p50 {r['p50_ms']:7.0f} ms  p95 {r['p95_ms']:7.0f} ms  errors={r['errors']}"
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        stub.terminate()
+        stub.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
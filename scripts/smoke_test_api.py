@@ -25,6 +25,32 @@ def run() -> None:
     assert "reply" in payload and isinstance(payload["reply"], str)
     assert "meta" in payload and isinstance(payload["meta"], dict)
 
+    stream = client.post("/chat/stream", json={"message": "Hello"})
+    assert stream.status_code == 200, stream.text
+    assert stream.headers["content-type"].startswith("text/event-stream")
+    assert "event: delta" in stream.text and "event: done" in stream.text
+
+    csv_bytes = (ROOT / "data" / "sample_transactions.csv").read_bytes()
+    upload = client.post(
+        "/transactions/upload",
+        params={"user_id": "smoke", "use_llm": "false"},
+        files={"file": ("transactions.csv", csv_bytes, "text/csv")},
+    )
+    assert upload.status_code == 200, upload.text
+    assert upload.json()["tx_count"] > 0
+    chat = client.post("/chat", json={"message": "Hello", "user_id": "smoke"})
+    assert chat.json()["meta"]["context_source"] == "uploaded_csv", chat.text
+    chat = client.post("/chat", json={"message": "Hello"})
+    assert chat.json()["meta"]["context_source"] == "sample_csv", chat.text
+    anonymous = client.post("/transactions/upload", files={"file": ("transactions.csv", csv_bytes, "text/csv")})
+    assert anonymous.status_code == 422, anonymous.text
+
+    chat = client.post("/chat", json={"message": "Where does my money go?", "timings": True})
+    assert "chat" in chat.json()["meta"]["timings"]["stages_ms"], chat.text
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200, metrics.text
+    assert 'wmm_stage_seconds_count{stage="chat"}' in metrics.text
+
     print("smoke_test_api: PASS")
 
 